@@ -1,5 +1,16 @@
 __version__ = "0.0.11"
 
-from . import query_creator
-from .builder import QueryBuilder
-from .pydantic_converter import from_pydantic
\ No newline at end of file
+from . import ir, query_creator
+from .analysis import CostEstimator, QueryCost, QueryTooComplexError
+from .builder import FrozenQueryBuilder, QueryBuilder
+from .bulk import build_many
+from .client import Client, GraphQLError
+from .loader import BatchLoader
+from .mutations import BulkMutator, MutationResult
+from .precompile import Manifest
+from .pydantic_converter import from_pydantic
+from .retry import HedgePolicy, LatencyTracker, RetryPolicy
+from .transport import HTTPTransport, TransportError
+from .upload import Upload, Variable
+from .usage import UsageTracker
+from .websocket import SubscriptionClient
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""Estimates how expensive a query is before it is sent to the server."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Tuple
+
+from gqlrequests.builder import FrozenQueryBuilder, QueryBuilder
+from gqlrequests.ir import Field, lower
+
+
+class QueryCost(NamedTuple):
+    depth: int
+    field_count: int
+    cost: float
+
+
+class QueryTooComplexError(ValueError):
+    """Raised when a query exceeds the limits of a CostEstimator."""
+
+    def __init__(self, message: str, query_cost: QueryCost) -> None:
+        super().__init__(message)
+        self.query_cost = query_cost
+
+
+class CostEstimator:
+    """Statically estimates the depth, field count and cost of a QueryBuilder.
+
+    Every selected field costs `field_cost` (or its entry in `field_costs`).
+    The selection of a list field is assumed to be repeated `list_size` times
+    (or its entry in `list_sizes`), unless the list is selected by a function
+    query with a pagination argument such as `first: 20`, in which case that
+    argument is used instead. The estimator works on lowered builders (see
+    `gqlrequests.ir`), and caches results per lowered field, so selections
+    shared between builders are only analyzed once.
+
+    Example usage:
+
+        estimator = CostEstimator(list_size=20, max_cost=5000, max_depth=6)
+
+        estimator.estimate(Character())  # QueryCost(depth=2, field_count=4, cost=42.0)
+        estimator.check(Character())  # Raises QueryTooComplexError if a limit is exceeded
+
+    """
+
+    def __init__(
+        self,
+        field_cost: float = 1.0,
+        list_size: float = 10.0,
+        field_costs: Dict[str, float] | None = None,
+        list_sizes: Dict[str, float] | None = None,
+        pagination_args: Tuple[str, ...] = ("first", "last", "limit"),
+        max_cost: float | None = None,
+        max_depth: int | None = None,
+        cache_size: int = 1024,
+    ) -> None:
+        self.field_cost = field_cost
+        self.list_size = list_size
+        self.field_costs = dict(field_costs or {})
+        self.list_sizes = dict(list_sizes or {})
+        self.pagination_args = pagination_args
+        self.max_cost = max_cost
+        self.max_depth = max_depth
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Field, QueryCost] = OrderedDict()
+
+    def estimate(self, builder: QueryBuilder | FrozenQueryBuilder) -> QueryCost:
+        """Returns the estimated cost of building and sending the builder."""
+        return self.estimate_field(lower(builder))
+
+    def estimate_field(self, field: Field) -> QueryCost:
+        """Returns the estimated cost of the selection of a lowered field."""
+        if (cached := self._cache.get(field)) is not None:
+            self._cache.move_to_end(field)
+            return cached
+
+        depth, field_count, cost = 1, 0, 0.0
+        for nested in field.selection or ():
+            field_count += 1
+            cost += self.field_costs.get(nested.name, self.field_cost)
+            if nested.selection is None:
+                continue
+
+            nested_cost = self.estimate_field(nested)
+            multiplier = self.list_multiplier(nested) if nested.is_list else 1.0
+            depth = max(depth, nested_cost.depth + 1)
+            field_count += nested_cost.field_count
+            cost += multiplier * nested_cost.cost
+
+        query_cost = QueryCost(depth, field_count, cost)
+        self._cache[field] = query_cost
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return query_cost
+
+    def list_multiplier(self, field: Field) -> float:
+        """Returns how many times the selection of a list field is assumed to be repeated."""
+        arguments = dict(field.arguments or ())
+        for arg in self.pagination_args:
+            if isinstance(arguments.get(arg), int) and not isinstance(arguments[arg], bool):
+                return arguments[arg]
+        return self.list_sizes.get(field.name, self.list_size)
+
+    def check(self, builder: QueryBuilder | FrozenQueryBuilder) -> QueryCost:
+        """Estimates the cost of the builder and raises QueryTooComplexError if
+        it exceeds `max_cost` or `max_depth`."""
+        query_cost = self.estimate(builder)
+        if self.max_depth is not None and query_cost.depth > self.max_depth:
+            raise QueryTooComplexError(
+                f"Query depth {query_cost.depth} exceeds the maximum depth of {self.max_depth}.", query_cost
+            )
+        if self.max_cost is not None and query_cost.cost > self.max_cost:
+            raise QueryTooComplexError(
+                f"Query cost {query_cost.cost} exceeds the maximum cost of {self.max_cost}.", query_cost
+            )
+        return query_cost
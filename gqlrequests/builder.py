@@ -3,15 +3,29 @@ These are then use to build GraphQL query strings in a Pythonic way."""
 
 from __future__ import annotations
 
+import functools
 import inspect
+import threading
 import typing
+import weakref
 from types import SimpleNamespace
-from typing import List
+from typing import Any, Callable, Dict, List, Tuple
 
-from gqlrequests.query_creator import generate_function_query_string, generate_query_string
+import gqlrequests
+from gqlrequests.query_creator import Directive, generate_function_query_string, generate_query_string, is_list_type
+from gqlrequests.upload import Upload, Variable
+
+# Only held while replacing the fields of a builder class. Readers never lock,
+# as the fields dict of a class is replaced instead of being mutated in place.
+_resolved_fields_lock = threading.Lock()
 
 
 class QueryBuilderMeta(type):
+    # Incremented whenever the fields of any builder class change. Builders cache
+    # what they build, and the cache may contain nested builder classes, so it is
+    # only valid for the generation it was built in.
+    fields_generation = 0
+
     def __new__(cls, name, bases, dct):
         new_class = super().__new__(cls, name, bases, dct)
         if not name == "QueryBuilder":
@@ -25,19 +39,22 @@ class QueryBuilderMeta(type):
 
         if name == "_resolved_fields":
             return super().__setattr__(name, value)
-        try:
-            old_fields = super().__getattribute__("_resolved_fields")
 
-        # This should not be possible, but is a failsafe measure
-        except AttributeError:  # pragma: no cover
-            old_fields = {}  # pragma: no cover
+        with _resolved_fields_lock:
+            try:
+                new_fields = dict(super().__getattribute__("_resolved_fields"))
 
-        if value is None:
-            old_fields.pop(name, None)
-        else:
-            old_fields[name] = value
+            # This should not be possible, but is a failsafe measure
+            except AttributeError:  # pragma: no cover
+                new_fields = {}  # pragma: no cover
 
-        super().__setattr__("_resolved_fields", old_fields)
+            if value is None:
+                new_fields.pop(name, None)
+            else:
+                new_fields[name] = value
+
+            super().__setattr__("_resolved_fields", new_fields)
+            QueryBuilderMeta.fields_generation += 1
 
 class QueryBuilder(metaclass=QueryBuilderMeta):
     """An abstract class used to build GraphQL queries.
@@ -67,6 +84,7 @@ class QueryBuilder(metaclass=QueryBuilderMeta):
     def __init__(self, fields: List[str] | None = None, func_name: str | None = None) -> None:
         # Used to avoid calls to __setattr__ when setting attributes
         self._query_build_data = SimpleNamespace()
+        self._reset_build_cache()
 
         # This will always be defined... Just need to help mypy out
         self._resolved_fields = getattr(self, "_resolved_fields", {})
@@ -77,50 +95,159 @@ class QueryBuilder(metaclass=QueryBuilderMeta):
         self.set("fields_to_build", { key: self._resolved_fields[key] for key in fields })
         self.set("func_name", func_name)
         self.set("build_function", False)
+        self.set("directives", {})
 
     @classmethod
     def add_field(cls, field_name: str, field_type: type) -> None:
-        cls._resolved_fields[field_name] = field_type
+        setattr(cls, field_name, field_type)
 
     @classmethod
     def remove_field(cls, field_name: str) -> None:
-        cls._resolved_fields.pop(field_name, None)
+        setattr(cls, field_name, None)
 
     def set(self, name, value):
         setattr(self._query_build_data, name, value)
+        self.invalidate()
 
     def get(self, name):
         return getattr(self._query_build_data, name)
 
     def build(self, indent_size: int = 4, start_indents: int = 0, strip_undersores: bool = False) -> str:
         """Generates a GraphQL query string based on the fields set in the
-        builder."""
-        if not (fields_to_build := self.get("fields_to_build")):
-            raise ValueError("No fields were selected for the query builder. Cannot build an empty query.")
-        
-        if strip_undersores:
-            fields_to_build = { key.strip("_"): value for key, value in fields_to_build.items() }
+        builder.
+
+        The result is cached until this builder, a builder nested in it or any
+        builder class is changed. Nested builder instances cache their own
+        results, so after a change only the changed branch is built again.
+        """
+        key = (indent_size, start_indents, strip_undersores)
+        return self._cached(key, lambda: build_query(self, indent_size, start_indents, strip_undersores))
+
+    def lower(self) -> gqlrequests.ir.Field:
+        """Returns this builder lowered to a Field tree (see `gqlrequests.ir`).
+        Cached like the build results."""
+        return self._cached("lowered", lambda: gqlrequests.ir.lower(self.freeze()))
+
+    def variables(self) -> Dict[str, Upload | Variable]:
+        """Returns the uploads and variables passed as function arguments to this
+        builder and the builders nested in it, by variable name. Cached like the
+        build results."""
+        return self._cached("variables", lambda: collect_variables(self))
+
+    def _cached(self, key: Any, compute: Callable[[], Any]) -> Any:
+        data = self._query_build_data
+        if data.cache_generation != QueryBuilderMeta.fields_generation:
+            data.cache = {}
+            data.cache_generation = QueryBuilderMeta.fields_generation
+
+        if (cached := data.cache.get(key)) is None:
+            cached = data.cache[key] = compute()
+        return cached
+
+    def defer(self, *field_names: str, label: str | None = None) -> QueryBuilder:
+        """Marks fields as deferred (`@defer`), so servers that support incremental
+        delivery can send them after the rest of the response. See
+        `Client.execute_incremental` for receiving the fields as they arrive."""
+        args = (("label", label),) if label is not None else ()
+        for field_name in field_names:
+            self._set_directive(field_name, ("defer", args))
+        return self
 
-        if self.get("build_function"):
-            if not (func_name := self.get("func_name")):
-                # This should be caught in __call__, so this is just a failsafe
-                raise ValueError(f"Cannot build function query for {__name__}. Function name is missing.")  # pragma: no cover
-            return generate_function_query_string(func_name, self.get("func_args"), fields_to_build, indent_size, start_indents)
-        return generate_query_string(fields_to_build, indent_size, start_indents)
+    def stream(self, field_name: str, initial_count: int = 0, label: str | None = None) -> QueryBuilder:
+        """Marks a list field as streamed (`@stream`), so servers that support
+        incremental delivery send its first `initial_count` items with the rest
+        of the response, and the other items one by one after it."""
+        if field_name in self._resolved_fields and not is_list_type(self._resolved_fields[field_name]):
+            raise ValueError(f"Only list fields can be streamed, and {field_name} is not a list field.")
+        args: Tuple[Tuple[str, Any], ...] = (("initialCount", initial_count),)
+        if label is not None:
+            args += (("label", label),)
+        self._set_directive(field_name, ("stream", args))
+        return self
+
+    def _set_directive(self, field_name: str, directive: Directive) -> None:
+        if field_name not in self.get("fields_to_build"):
+            raise ValueError(f"{field_name} is not selected by this {self.__class__.__name__} builder.")
+        directives = dict(self.get("directives"))
+        others = tuple(existing for existing in directives.get(field_name, ()) if existing[0] != directive[0])
+        directives[field_name] = others + (directive,)
+        self.set("directives", directives)
+
+    def invalidate(self) -> None:
+        """Clears the cached build results of this builder and of every builder it is nested in."""
+        pending, seen = [self], set()
+        while pending:
+            builder = pending.pop()
+            if id(builder) in seen:
+                continue
+            seen.add(id(builder))
+            builder._query_build_data.cache = {}
+            pending.extend(builder._query_build_data.parents)
+
+    def _reset_build_cache(self) -> None:
+        data = self._query_build_data
+        data.cache = {}
+        data.cache_generation = QueryBuilderMeta.fields_generation
+        # Builders this builder is nested in. Weak, so that nesting does not keep parents alive
+        data.parents = weakref.WeakSet()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        data = vars(self._query_build_data).copy()
+        for name in ("cache", "cache_generation", "parents"):
+            data.pop(name, None)
+        # Shallow copies get their own selections, so changing one does not stale the cache of the other
+        for name in ("fields_to_build", "func_args", "directives"):
+            if name in data:
+                data[name] = dict(data[name])
+        state["_query_build_data"] = SimpleNamespace(**data)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset_build_cache()
+        for value in self.get("fields_to_build").values():
+            if isinstance(value, QueryBuilder):
+                value._query_build_data.parents.add(self)
+
+    def freeze(self) -> FrozenQueryBuilder:
+        """Returns an immutable and hashable snapshot of this builder.
+
+        Nested builder classes are snapshotted as well, so later changes to
+        this builder or to any builder class do not affect the snapshot. The
+        snapshot can be built from many threads at once and caches what it builds.
+        The snapshot is cached like the build results.
+
+        Uploads are replaced by `Variable` placeholders, so the module level
+        build caches never keep files alive. Pass the uploads in the variables
+        when executing the snapshot.
+        """
+        return self._cached("frozen", self._freeze)
+
+    def _freeze(self) -> FrozenQueryBuilder:
+        fields = tuple((name, freeze_type(value)) for name, value in list(self.get("fields_to_build").items()))
+        func_args = tuple(
+            (key, Variable(value.variable or key, "Upload!") if isinstance(value, Upload) else value)
+            for key, value in self.get("func_args").items()
+        ) if self.get("build_function") else ()
+        return FrozenQueryBuilder(
+            type(self),
+            fields,
+            tuple(self._resolved_fields.items()),
+            self.get("func_name"),
+            func_args,
+            self.get("build_function"),
+            tuple(self.get("directives").items()),
+        )
 
     def __call__(self, **args) -> QueryBuilder:
         """After calling this method, the builder will build a function."""
         if not self._query_build_data.func_name:
             raise ValueError("No function name was set for this builder.")
 
-        # TODO: Add support for non-primitive arguments
-        for key, value in args.items():
-            if type(value) not in self.SUPPORTED_TYPES:
-                raise ValueError(
-                    f"Function argument {key} of {self.get('func_name')} must be of"
-                    f"the following types: {self.SUPPORTED_TYPES}"
-                )
-
+        validate_func_args(self.get("func_name"), args)
+        # Uploads are sent as variables, named after their argument by default
+        args = {key: value.named(key) if isinstance(value, Upload) else value for key, value in args.items()}
         self.set("func_args", args)
         self.set("build_function", True)
 
@@ -130,11 +257,21 @@ class QueryBuilder(metaclass=QueryBuilderMeta):
         if name in {"_query_build_data", "_resolved_fields"}:
             return super().__setattr__(name, value)
 
-        if value is None:
-            self._query_build_data.fields_to_build.pop(name, None)
-
-        elif self.valid_field(name, value):
-            self._query_build_data.fields_to_build[name] = value
+        fields_to_build = self._query_build_data.fields_to_build
+        if value is None or self.valid_field(name, value):
+            old_value = fields_to_build.get(name)
+            if value is None:
+                fields_to_build.pop(name, None)
+                self._query_build_data.directives.pop(name, None)
+            else:
+                fields_to_build[name] = value
+                if isinstance(value, QueryBuilder):
+                    value._query_build_data.parents.add(self)
+
+            still_nested = any(other is old_value for other in fields_to_build.values())
+            if isinstance(old_value, QueryBuilder) and not still_nested:
+                old_value._query_build_data.parents.discard(self)
+            self.invalidate()
 
         else:
             try:
@@ -166,6 +303,220 @@ class QueryBuilder(metaclass=QueryBuilderMeta):
             return False
         if value == self._resolved_fields[name]:
             return True
-        if type(value) != type and isinstance(value, QueryBuilder):
-            return type(value) == self._resolved_fields[name]
-        return False
\ No newline at end of file
+        if type(value) != type and isinstance(value, (QueryBuilder, FrozenQueryBuilder)):
+            # Builder instances select the items of list fields, e.g. Episode() for List[Episode]
+            expected_type = self._resolved_fields[name]
+            while is_list_type(expected_type):
+                expected_type = expected_type.__args__[0]
+            if isinstance(value, FrozenQueryBuilder):
+                return value.builder_type == expected_type
+            return type(value) == expected_type
+        return False
+
+
+class FrozenQueryBuilder:
+    """An immutable, hashable snapshot of a QueryBuilder created by `QueryBuilder.freeze`.
+
+    Frozen builders build the same query strings as the builders they were
+    created from, and can be used wherever a built builder instance is accepted,
+    including as a field value of other builders. Equal snapshots build equal
+    query strings, which makes them usable as cache keys.
+
+    Example usage:
+
+        frozen = Character(func_name="getCharacter")(name="Luke").freeze()
+
+        with ThreadPoolExecutor() as executor:
+            queries = list(executor.map(lambda _: frozen.build(), range(100)))
+
+    """
+
+    __slots__ = (
+        "builder_type", "fields", "resolved_fields", "func_name", "func_args", "build_function", "directives", "_hash"
+    )
+
+    builder_type: type
+    fields: Tuple[Tuple[str, Any], ...]
+    resolved_fields: Tuple[Tuple[str, Any], ...]
+    func_name: str | None
+    func_args: Tuple[Tuple[str, Any], ...]
+    build_function: bool
+    directives: Tuple[Tuple[str, Tuple[Directive, ...]], ...]
+    _hash: int
+
+    def __init__(
+        self,
+        builder_type: type,
+        fields: Tuple[Tuple[str, Any], ...],
+        resolved_fields: Tuple[Tuple[str, Any], ...],
+        func_name: str | None,
+        func_args: Tuple[Tuple[str, Any], ...],
+        build_function: bool,
+        directives: Tuple[Tuple[str, Tuple[Directive, ...]], ...] = (),
+    ) -> None:
+        object.__setattr__(self, "builder_type", builder_type)
+        object.__setattr__(self, "fields", fields)
+        object.__setattr__(self, "resolved_fields", resolved_fields)
+        object.__setattr__(self, "func_name", func_name)
+        object.__setattr__(self, "func_args", func_args)
+        object.__setattr__(self, "build_function", build_function)
+        object.__setattr__(self, "directives", directives)
+        object.__setattr__(self, "_hash", hash(self._key()))
+
+    def _key(self) -> tuple:
+        # True == 1, but they build to different arguments
+        func_args = tuple((key, type(value), value) for key, value in self.func_args)
+        return (
+            self.builder_type, self.fields, self.resolved_fields, self.func_name, func_args, self.build_function, self.directives
+        )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Cannot set {name} on a frozen {self.builder_type.__name__} builder.")
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FrozenQueryBuilder):
+            return NotImplemented
+        return self._hash == other._hash and self._key() == other._key()
+
+    def __reduce__(self) -> tuple:
+        args = (
+            self.builder_type, self.fields, self.resolved_fields, self.func_name, self.func_args, self.build_function, self.directives
+        )
+        return (FrozenQueryBuilder, args)
+
+    def __repr__(self) -> str:
+        return f"<frozen {self.builder_type.__name__} builder>"
+
+    def get(self, name: str) -> Any:
+        """Mirrors `QueryBuilder.get` for the build data of the snapshot."""
+        if name == "fields_to_build":
+            return dict(self.fields)
+        if name == "func_args":
+            return dict(self.func_args)
+        if name == "directives":
+            return dict(self.directives)
+        if name in {"func_name", "build_function"}:
+            return getattr(self, name)
+        raise AttributeError(f"Frozen builders have no build data named {name}.")
+
+    def __call__(self, **args) -> FrozenQueryBuilder:
+        """Returns a snapshot that builds a function with the given arguments,
+        leaving this snapshot unchanged. Useful for reusing one frozen template."""
+        if not self.func_name:
+            raise ValueError("No function name was set for this builder.")
+        if any(isinstance(value, Upload) for value in args.values()):
+            raise ValueError(
+                "Frozen builders can not hold uploads. Pass a Variable instead, and the upload in the variables of the request."
+            )
+
+        validate_func_args(self.func_name, args)
+        return FrozenQueryBuilder(
+            self.builder_type, self.fields, self.resolved_fields, self.func_name, tuple(args.items()), True, self.directives
+        )
+
+    def build(self, indent_size: int = 4, start_indents: int = 0, strip_undersores: bool = False) -> str:
+        """Generates a GraphQL query string. The result is cached."""
+        return _build_frozen_query(self, indent_size, start_indents, strip_undersores)
+
+    def variables(self) -> Dict[str, Upload | Variable]:
+        """Mirrors `QueryBuilder.variables`. Snapshots never hold uploads. The result is cached."""
+        return _frozen_variables(self)
+
+
+@functools.lru_cache(maxsize=4096)
+def _build_frozen_query(frozen: FrozenQueryBuilder, indent_size: int, start_indents: int, strip_undersores: bool) -> str:
+    return gqlrequests.ir.print_document(gqlrequests.ir.lower(frozen), indent_size, start_indents, strip_undersores)
+
+
+@functools.lru_cache(maxsize=4096)
+def _frozen_variables(frozen: FrozenQueryBuilder) -> Dict[str, Upload | Variable]:
+    return collect_variables(frozen)
+
+
+def collect_variables(builder: QueryBuilder | FrozenQueryBuilder) -> Dict[str, Upload | Variable]:
+    variables: Dict[str, Upload | Variable] = {}
+    if builder.get("build_function"):
+        for value in builder.get("func_args").values():
+            if isinstance(value, Upload):
+                add_variable(variables, value.variable or "", value)
+            elif isinstance(value, Variable):
+                add_variable(variables, value.name, value)
+    # Builder classes have no arguments, only nested instances and snapshots do
+    for value in builder.get("fields_to_build").values():
+        if isinstance(value, (QueryBuilder, FrozenQueryBuilder)):
+            for name, variable in value.variables().items():
+                add_variable(variables, name, variable)
+    return variables
+
+
+def add_variable(variables: Dict[str, Upload | Variable], name: str, value: Upload | Variable) -> None:
+    if (existing := variables.setdefault(name, value)) is value:
+        return
+    # Named copies of one upload share its file
+    same_file = isinstance(existing, Upload) and isinstance(value, Upload) and existing.file is value.file
+    if not same_file and existing != value:
+        raise ValueError(
+            f"Variable ${name} is used for different values in one query. Name uploads with Upload(..., variable=...)."
+        )
+
+
+def build_query(
+    builder: QueryBuilder | FrozenQueryBuilder, indent_size: int, start_indents: int, strip_undersores: bool
+) -> str:
+    if not (fields_to_build := builder.get("fields_to_build")):
+        raise ValueError("No fields were selected for the query builder. Cannot build an empty query.")
+
+    directives = builder.get("directives")
+    if strip_undersores:
+        fields_to_build = { key.strip("_"): value for key, value in fields_to_build.items() }
+        directives = { key.strip("_"): value for key, value in directives.items() }
+
+    if builder.get("build_function"):
+        if not (func_name := builder.get("func_name")):
+            # This should be caught in __call__, so this is just a failsafe
+            raise ValueError(f"Cannot build function query for {__name__}. Function name is missing.")  # pragma: no cover
+        return generate_function_query_string(func_name, builder.get("func_args"), fields_to_build, indent_size, start_indents, directives)
+    return generate_query_string(fields_to_build, indent_size, start_indents, directives)
+
+
+def validate_func_args(func_name: str, args: Dict[str, Any]) -> None:
+    # TODO: Add support for non-primitive arguments
+    for key, value in args.items():
+        if not isinstance(value, (Upload, Variable)) and type(value) not in QueryBuilder.SUPPORTED_TYPES:
+            raise ValueError(
+                f"Function argument {key} of {func_name} must be of"
+                f"the following types: {QueryBuilder.SUPPORTED_TYPES}"
+            )
+
+
+def freeze_type(type_hint: Any) -> Any:
+    """Snapshots builders used as field types. Other field types are immutable already."""
+    if isinstance(type_hint, QueryBuilder):
+        return type_hint.freeze()
+
+    item_type = type_hint
+    while is_list_type(item_type):
+        item_type = item_type.__args__[0]
+    if inspect.isclass(item_type) and issubclass(item_type, QueryBuilder):
+        return freeze_class(item_type)
+    return type_hint
+
+
+def freeze_class(builder_class: type) -> FrozenQueryBuilder:
+    """Returns a snapshot of a builder class with all of its fields selected. The
+    snapshot is cached until the fields of any builder class change, so builder
+    classes are not instantiated every time a builder using them is frozen."""
+    generation = QueryBuilderMeta.fields_generation
+    # Looked up in the class itself, as subclasses would otherwise see the snapshot of their base
+    cached = builder_class.__dict__.get("_frozen_snapshot")
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    frozen = builder_class().freeze()
+    # Stored on the class, so it lives exactly as long as the class does. Set with
+    # type.__setattr__, as setting attributes through the metaclass adds fields
+    type.__setattr__(builder_class, "_frozen_snapshot", (generation, frozen))
+    return frozen
@@ -0,0 +1,109 @@
+"""Builds large numbers of queries, optionally spread over threads or processes."""
+
+from __future__ import annotations
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+from gqlrequests.builder import FrozenQueryBuilder, QueryBuilder
+from gqlrequests.client import build_document
+
+Buildable = Union[QueryBuilder, FrozenQueryBuilder]
+BuildItem = Union[Buildable, Tuple[Buildable, Dict[str, Any]]]
+
+
+def build_many(
+    items: Iterable[BuildItem],
+    indent_size: int = 4,
+    executor: Executor | None = None,
+    ordered: bool = True,
+    chunk_size: int = 256,
+    max_pending_chunks: int | None = None,
+) -> Iterator[Any]:
+    """Builds a GraphQL document for every item, yielding them as they are done.
+
+    Items are builders, or `(builder, args)` pairs where the builder is used as
+    a template and called with the arguments (without changing the builder).
+    Builders cache their snapshots, so a template is only frozen once, and
+    nested selections shared between items are only rendered once by the
+    snapshot caches.
+
+    Without an executor the documents are built in the current thread. With a
+    ThreadPoolExecutor or ProcessPoolExecutor, items are sent to it in chunks
+    of `chunk_size`, with at most `max_pending_chunks` chunks (by default twice
+    the number of CPUs) in flight, so the items are consumed lazily. With a
+    process pool, builder classes must be importable by the worker processes.
+
+    Ordered output yields the documents in the order of the items. Unordered
+    output yields `(index, document)` pairs as soon as each chunk is done.
+
+    Example usage:
+
+        user = User(func_name="user")
+        with ProcessPoolExecutor() as executor:
+            for document in build_many(((user, {"id": i}) for i in range(100_000)), executor=executor):
+                replay_file.write(document)
+
+    """
+    frozen_items = _freeze_items(items)
+    if executor is None:
+        for index, frozen in enumerate(frozen_items):
+            document = build_document(frozen, indent_size)
+            yield document if ordered else (index, document)
+        return
+
+    if max_pending_chunks is None:
+        max_pending_chunks = 2 * (os.cpu_count() or 1)
+
+    chunks = _chunked(frozen_items, chunk_size)
+    if ordered:
+        pending: Deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_build_chunk, chunk, indent_size))
+            if len(pending) >= max_pending_chunks:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+        return
+
+    start_indices: Dict[Future, int] = {}
+    running: Set[Future] = set()
+    start = 0
+    for chunk in chunks:
+        future = executor.submit(_build_chunk, chunk, indent_size)
+        start_indices[future] = start
+        running.add(future)
+        start += len(chunk)
+        if len(running) >= max_pending_chunks:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            yield from _indexed_results(done, start_indices)
+    while running:
+        done, running = wait(running, return_when=FIRST_COMPLETED)
+        yield from _indexed_results(done, start_indices)
+
+
+def _freeze_items(items: Iterable[BuildItem]) -> Iterator[FrozenQueryBuilder]:
+    for item in items:
+        builder, args = item if isinstance(item, tuple) else (item, None)
+        # The snapshot of a template is cached on the builder itself
+        frozen = builder if isinstance(builder, FrozenQueryBuilder) else builder.freeze()
+        yield frozen if args is None else frozen(**args)
+
+
+def _chunked(frozen_items: Iterator[FrozenQueryBuilder], chunk_size: int) -> Iterator[List[FrozenQueryBuilder]]:
+    while chunk := list(itertools.islice(frozen_items, chunk_size)):
+        yield chunk
+
+
+def _build_chunk(chunk: List[FrozenQueryBuilder], indent_size: int) -> List[str]:
+    return [build_document(frozen, indent_size) for frozen in chunk]
+
+
+def _indexed_results(done: Set[Future], start_indices: Dict[Future, int]) -> Iterator[Tuple[int, str]]:
+    for future in done:
+        start = start_indices.pop(future)
+        for offset, document in enumerate(future.result()):
+            yield start + offset, document
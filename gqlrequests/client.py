@@ -0,0 +1,223 @@
+"""Executes documents built by QueryBuilders against a GraphQL server."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from gqlrequests.analysis import CostEstimator
+from gqlrequests.builder import FrozenQueryBuilder, QueryBuilder
+from gqlrequests.incremental import merge_payload
+from gqlrequests.json_codec import get_codec
+from gqlrequests.retry import HedgePolicy, LatencyTracker, RetryPolicy, hedged
+from gqlrequests.transport import Transport
+from gqlrequests.upload import Upload, Variable, extract_files
+from gqlrequests.usage import UsageTracker
+
+
+class GraphQLError(Exception):
+    """Raised when the server answers with errors instead of data."""
+
+    def __init__(self, errors: List[Dict[str, Any]]) -> None:
+        super().__init__("; ".join(str(error.get("message", error)) for error in errors))
+        self.errors = errors
+
+
+OPERATION_TYPES = ("query", "mutation", "subscription")
+
+
+def build_document(
+    query: QueryBuilder | FrozenQueryBuilder | str,
+    indent_size: int = 4,
+    operation_type: str = "query",
+    variables: Dict[str, Upload | Variable] | None = None,
+) -> str:
+    """Turns a builder into a complete GraphQL document.
+
+    Plain builders already build to an anonymous query (`{ ... }`), but function
+    builders build to a single field (`func(arg: 1) { ... }`) that has to be
+    wrapped in a selection set before it can be sent to a server. Mutations and
+    subscriptions are prefixed with their operation type, e.g. `subscription { ... }`.
+    Uploads and variables in function arguments are declared, e.g.
+    `mutation($photo: Upload!) { ... }`. They are looked up with `find_variables`
+    unless they are given.
+    """
+    if operation_type not in OPERATION_TYPES:
+        raise ValueError(f"Invalid operation type: {operation_type}. Expected one of {OPERATION_TYPES}.")
+    if isinstance(query, str):
+        return query
+
+    prefix = "" if operation_type == "query" else operation_type + " "
+    if variables is None:
+        variables = find_variables(query)
+    if variables:
+        declarations = (
+            f"${name}: {value.type if isinstance(value, Variable) else 'Upload!'}" for name, value in variables.items()
+        )
+        prefix = operation_type + "(" + ", ".join(declarations) + ") "
+    if query.get("build_function"):
+        return prefix + "{\n" + " " * indent_size + query.build(indent_size, indent_size) + "}\n"
+    return prefix + query.build(indent_size)
+
+
+def find_variables(query: QueryBuilder | FrozenQueryBuilder) -> Dict[str, Upload | Variable]:
+    """Returns the uploads and variables passed as function arguments anywhere in
+    the query, by variable name, without freezing or building the query."""
+    return query.variables()
+
+
+class Client:
+    """Sends queries built by QueryBuilders through a transport.
+
+    Identical queries (same document and variables) that are executed while
+    an earlier one is still in flight are coalesced: only one request is sent
+    and every caller receives the same response object, which should therefore
+    be treated as read-only.
+
+    If an `estimator` is given, builders are checked against its limits before
+    they are sent, raising QueryTooComplexError for queries that are too expensive.
+
+    If a `usage_tracker` is given, the `data` of responses to builders is
+    wrapped so the tracker records which fields are read, and builders are
+    pruned before they are sent if the tracker has `auto_prune` set.
+
+    The latency of every successful request is recorded in `latencies`, per
+    operation (the function name of function builders, or the document). Failed
+    queries are sent again according to the `retry` policy, and slow queries are
+    hedged according to the `hedge` policy, which uses these latencies. Mutations
+    and uploads are sent exactly once.
+
+    Example usage:
+
+        client = gqlrequests.Client(HTTPTransport("https://example.com/graphql"))
+
+        getCharacter = Character(func_name="getCharacter")
+        response = await client.execute(getCharacter(name="Luke"))
+        print(response["data"]["getCharacter"]["name"])
+
+    """
+
+    def __init__(
+        self,
+        transport: Transport,
+        coalesce: bool = True,
+        estimator: CostEstimator | None = None,
+        usage_tracker: UsageTracker | None = None,
+        retry: RetryPolicy | None = None,
+        hedge: HedgePolicy | None = None,
+        latencies: LatencyTracker | None = None,
+    ) -> None:
+        self.transport = transport
+        self.coalesce = coalesce
+        self.estimator = estimator
+        self.usage_tracker = usage_tracker
+        self.retry = retry
+        self.hedge = hedge
+        self.latencies = latencies or LatencyTracker()
+        self._in_flight: Dict[Tuple[str, bytes], asyncio.Future] = {}
+
+    async def execute(
+        self,
+        query: QueryBuilder | FrozenQueryBuilder | str,
+        variables: Dict[str, Any] | None = None,
+        operation_type: str = "query",
+    ) -> Dict[str, Any]:
+        """Sends the query (or mutation) and returns the decoded response."""
+        if self.usage_tracker is None or isinstance(query, str):
+            return await self._execute(query, variables, operation_type)
+
+        # Usage is recorded under the shape from before pruning, so fields that
+        # are read after being pruned are selected again by later prunes
+        shape = self.usage_tracker.shape(query)
+        if self.usage_tracker.auto_prune and isinstance(query, QueryBuilder):
+            self.usage_tracker.prune(query)
+
+        response = await self._execute(query, variables, operation_type)
+        if response.get("data") is None:
+            return response
+        return {**response, "data": self.usage_tracker.track(shape, response["data"])}
+
+    async def execute_incremental(
+        self, query: QueryBuilder | FrozenQueryBuilder | str, variables: Dict[str, Any] | None = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Sends a query with deferred or streamed fields (see `QueryBuilder.defer`
+        and `QueryBuilder.stream`) and yields the result as it is delivered: first
+        the initial payload, then the result after every incremental payload is
+        merged into it. The same result dict is updated and yielded every time,
+        and `result["hasNext"]` is False once the result is complete.
+
+        Transports without a `stream` method (and servers that do not support
+        incremental delivery) deliver the whole result at once.
+
+        Example usage:
+
+            character = Character(func_name="getCharacter")(name="Luke").defer("friends")
+            async for result in client.execute_incremental(character):
+                render(result["data"])
+
+        """
+        if (stream := getattr(self.transport, "stream", None)) is None:
+            yield await self._execute(query, variables, "query")
+            return
+
+        if self.estimator is not None and not isinstance(query, str):
+            self.estimator.check(query)
+        document = build_document(query)
+        result: Dict[str, Any] = {}
+        async for payload in stream(document, variables):
+            yield merge_payload(result, payload)
+
+    async def _execute(
+        self, query: QueryBuilder | FrozenQueryBuilder | str, variables: Dict[str, Any] | None, operation_type: str
+    ) -> Dict[str, Any]:
+        if self.estimator is not None and not isinstance(query, str):
+            self.estimator.check(query)
+
+        # Looked up once, as they are needed both to declare and to send the uploads
+        found = {} if isinstance(query, str) else find_variables(query)
+        document = build_document(query, operation_type=operation_type, variables=found)
+        if uploads := {name: value for name, value in found.items() if isinstance(value, Upload)}:
+            variables = {**(variables or {}), **uploads}
+        # Uploads for frozen builders and strings are only given in the variables, possibly nested in lists
+        has_uploads = bool(extract_files(variables)[1]) if variables else False
+
+        operation = query.get("func_name") if not isinstance(query, str) and query.get("build_function") else document
+        # Mutations have side effects, so they are never coalesced, retried or hedged
+        if operation_type != "query" or has_uploads:
+            return await self._send(operation, document, variables)
+        if not self.coalesce:
+            return await self._send_query(operation, document, variables)
+
+        key = (document, get_codec().dumps(variables, sort_keys=True))
+        if (request := self._in_flight.get(key)) is None:
+            request = asyncio.ensure_future(self._send_query(operation, document, variables))
+            self._in_flight[key] = request
+            request.add_done_callback(lambda _: self._forget(key, request))
+
+        # Shielded so that one caller being cancelled does not cancel the request for the others
+        return await asyncio.shield(request)
+
+    async def _send_query(self, operation: str, document: str, variables: Dict[str, Any] | None) -> Dict[str, Any]:
+        attempt = 0
+        while True:
+            try:
+                if self.hedge is None:
+                    return await self._send(operation, document, variables)
+                threshold = self.hedge.threshold(self.latencies, operation)
+                return await hedged(lambda: self._send(operation, document, variables), threshold, self.hedge.max_hedges)
+            except Exception as e:
+                if self.retry is None or attempt + 1 >= self.retry.attempts or not self.retry.should_retry(e):
+                    raise
+            await asyncio.sleep(self.retry.delay(attempt))
+            attempt += 1
+
+    async def _send(self, operation: str, document: str, variables: Dict[str, Any] | None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        response = await self.transport(document, variables)
+        self.latencies.record(operation, time.perf_counter() - started)
+        return response
+
+    def _forget(self, key: Tuple[str, bytes], request: asyncio.Future) -> None:
+        if self._in_flight.get(key) is request:
+            del self._in_flight[key]
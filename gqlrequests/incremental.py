@@ -0,0 +1,110 @@
+"""Incremental delivery of responses to queries with `@defer` and `@stream` fields.
+
+Servers send such responses as `multipart/mixed` bodies. The first part holds
+the initial payload (`{"data": ..., "hasNext": true}`), and every following
+part holds one or more incremental payloads, which add deferred fields
+(`{"data": ..., "path": [...]}`) or streamed list items (`{"items": [...],
+"path": [..., index]}`) to the result, until a part with `"hasNext": false`.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+INCREMENTAL_ACCEPT = "multipart/mixed;deferSpec=20220824"
+DEFAULT_BOUNDARY = "-"
+KEEP_ALIVE_PARTS = {b"", b"{}"}
+
+
+def multipart_boundary(headers: Dict[str, str]) -> str | None:
+    """Returns the boundary of a `multipart/mixed` response, or None for other responses."""
+    content_type, *parameters = headers.get("content-type", "").split(";")
+    if content_type.strip().lower() != "multipart/mixed":
+        return None
+    for parameter in parameters:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "boundary":
+            return value.strip().strip('"')
+    return DEFAULT_BOUNDARY
+
+
+class MultipartMixedParser:
+    """Splits a `multipart/mixed` body into the bodies of its parts, which may be
+    fed in chunks of any size as they arrive. Empty parts, which some servers send
+    to keep the connection alive, are skipped."""
+
+    def __init__(self, boundary: str) -> None:
+        self.delimiter = b"\r\n--" + boundary.encode()
+        # The first delimiter does not have to be preceded by a line break
+        self._buffer = bytearray(b"\r\n")
+        self._in_part = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """Returns the bodies of the parts that were completed by the chunk."""
+        self._buffer += chunk
+        parts = []
+        while not self.done:
+            index = self._buffer.find(self.delimiter)
+            after = index + len(self.delimiter)
+            if index < 0 or len(self._buffer) < after + 2:
+                break
+            if self._buffer[after:after + 2] == b"--":
+                self.done = True
+                line_end = after
+            elif (line_end := self._buffer.find(b"\r\n", after)) < 0:
+                break
+
+            if self._in_part and (body := part_body(bytes(self._buffer[:index]))).strip() not in KEEP_ALIVE_PARTS:
+                parts.append(body)
+            self._in_part = True
+            del self._buffer[:line_end + 2]
+        return parts
+
+
+def part_body(part: bytes) -> bytes:
+    # Parts without headers start with the empty line that ends the headers
+    if part.startswith(b"\r\n"):
+        return part[2:]
+    return part.partition(b"\r\n\r\n")[2]
+
+
+def merge_payload(result: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Applies an initial or subsequent payload to the result, in place, and returns the result."""
+    # Older servers send subsequent payloads without the "incremental" list
+    if "path" in payload:
+        payload = {"incremental": [payload], "hasNext": payload.get("hasNext", False)}
+
+    if "data" in payload:
+        result["data"] = payload["data"]
+    for increment in payload.get("incremental", ()):
+        path = increment.get("path", [])
+        if "items" in increment:
+            index = path[-1]
+            items = increment["items"]
+            resolve_path(result.get("data"), path[:-1])[index:index + len(items)] = items
+        elif increment.get("data") is not None:
+            merge_data(resolve_path(result.get("data"), path), increment["data"])
+        result.setdefault("errors", []).extend(increment.get("errors", ()))
+
+    result.setdefault("errors", []).extend(payload.get("errors", ()))
+    if not result["errors"]:
+        del result["errors"]
+    if "extensions" in payload:
+        result.setdefault("extensions", {}).update(payload["extensions"])
+    result["hasNext"] = payload.get("hasNext", False)
+    return result
+
+
+def resolve_path(data: Any, path: Sequence[str | int]) -> Any:
+    for key in path:
+        data = data[key]
+    return data
+
+
+def merge_data(target: Dict[str, Any], data: Dict[str, Any]) -> None:
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_data(target[key], value)
+        else:
+            target[key] = value
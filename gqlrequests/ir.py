@@ -0,0 +1,226 @@
+"""A compact, immutable representation of built queries.
+
+Builders are lowered once into a tree of `Field` nodes, which is cached per
+builder shape. Printers and analyzers work on these trees instead of walking
+builders, builder classes and type hints again every time."""
+
+from __future__ import annotations
+
+import functools
+import weakref
+from typing import Any, Tuple, Type
+
+from pydantic import BaseModel
+
+from gqlrequests.builder import FrozenQueryBuilder, QueryBuilder, QueryBuilderMeta, freeze_class
+from gqlrequests.query_creator import (
+    Directive,
+    FieldTypeEnum,
+    ValidFieldTypes,
+    format_argument,
+    format_directives,
+    is_list_type,
+    resolve_type,
+)
+
+
+class Field:
+    """A selected field, e.g. `name`, `friends { ... }` or `search(name: "Anna") { ... }`.
+
+    `arguments` is None for fields that are not functions, and `selection` is
+    None for leaf fields. The root of a lowered builder is a field with an empty
+    name (unless it is a function), whose selection is the builder's fields.
+    `directives` are the directives of the field, e.g. `@stream(initialCount: 2)`.
+    Fields are immutable and hashable, with the hash computed once.
+    """
+
+    __slots__ = ("name", "arguments", "selection", "is_list", "directives", "_hash")
+
+    name: str
+    arguments: Tuple[Tuple[str, Any], ...] | None
+    selection: Tuple[Field, ...] | None
+    is_list: bool
+    directives: Tuple[Directive, ...]
+    _hash: int
+
+    def __init__(
+        self,
+        name: str,
+        arguments: Tuple[Tuple[str, Any], ...] | None = None,
+        selection: Tuple[Field, ...] | None = None,
+        is_list: bool = False,
+        directives: Tuple[Directive, ...] = (),
+    ) -> None:
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "arguments", arguments)
+        object.__setattr__(self, "selection", selection)
+        object.__setattr__(self, "is_list", is_list)
+        object.__setattr__(self, "directives", directives)
+        object.__setattr__(self, "_hash", hash(self._key()))
+
+    def _key(self) -> tuple:
+        # True == 1, but they print to different arguments
+        arguments = None if self.arguments is None else tuple((k, type(v), v) for k, v in self.arguments)
+        return (self.name, arguments, self.selection, self.is_list, self.directives)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Cannot set {name} on an immutable Field.")
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, Field):
+            return NotImplemented
+        return self._hash == other._hash and self._key() == other._key()
+
+    def __reduce__(self) -> tuple:
+        return (Field, (self.name, self.arguments, self.selection, self.is_list, self.directives))
+
+    def __repr__(self) -> str:
+        directives = f", directives={self.directives!r}" if self.directives else ""
+        return (
+            f"Field({self.name!r}, arguments={self.arguments!r}, selection={self.selection!r}, "
+            f"is_list={self.is_list}{directives})"
+        )
+
+    def renamed(self, name: str, is_list: bool, directives: Tuple[Directive, ...] | None = None) -> Field:
+        directives = self.directives if directives is None else directives
+        return Field(name, self.arguments, self.selection, is_list, directives)
+
+
+# Lowering
+
+def lower(builder: QueryBuilder | FrozenQueryBuilder) -> Field:
+    """Lowers a builder into a Field tree. Builders cache their lowered tree until
+    they change, and frozen builders are cached by snapshot."""
+    if isinstance(builder, QueryBuilder):
+        return builder.lower()
+    return _lower_frozen(builder)
+
+
+@functools.lru_cache(maxsize=4096)
+def _lower_frozen(frozen: FrozenQueryBuilder) -> Field:
+    declared = dict(frozen.resolved_fields)
+    directives = dict(frozen.directives)
+    selection = tuple(
+        lower_field(name, hint, declared.get(name), directives.get(name, ())) for name, hint in frozen.fields
+    )
+    if frozen.build_function:
+        return Field(frozen.func_name or "", frozen.func_args, selection)
+    return Field("", None, selection)
+
+
+_lowered_classes: weakref.WeakKeyDictionary[type, Tuple[int, Field]] = weakref.WeakKeyDictionary()
+
+
+def lower_class(builder_class: Type[QueryBuilder]) -> Field:
+    """Lowers a builder class with all of its fields selected. The result is cached
+    until the fields of any builder class change."""
+    generation = QueryBuilderMeta.fields_generation
+    cached = _lowered_classes.get(builder_class)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    lowered = _lower_frozen(freeze_class(builder_class))
+    _lowered_classes[builder_class] = (generation, lowered)
+    return lowered
+
+
+@functools.lru_cache(maxsize=1024)
+def lower_model(model: Type[BaseModel]) -> Field:
+    """Lowers a pydantic model with all of its fields selected."""
+    annotations = model.__annotations__
+    return Field("", None, tuple(lower_field(name, hint, hint) for name, hint in annotations.items()))
+
+
+def lower_field(
+    name: str, type_hint: ValidFieldTypes, declared_type: Any, directives: Tuple[Directive, ...] = ()
+) -> Field:
+    """Lowers a single field of a builder, given its type hint (or nested builder)."""
+    field_type_type, field_type = resolve_type(type_hint)
+    is_list = is_list_type(type_hint) or is_list_type(declared_type)
+
+    if field_type_type in {FieldTypeEnum.PRIMITIVE, FieldTypeEnum.ENUM}:
+        return Field(name, None, None, is_list, directives)
+
+    if field_type_type == FieldTypeEnum.QUERY_BUILDER_CLASS:
+        return lower_class(field_type).renamed(name, is_list, directives)  # type: ignore
+
+    if field_type_type == FieldTypeEnum.QUERY_BUILDER_INSTANCE:
+        nested = lower(field_type)  # type: ignore
+        # Nested functions are selected by their function name instead of the field name
+        return nested.renamed(nested.name if nested.arguments is not None else name, is_list, directives)
+
+    if field_type_type == FieldTypeEnum.PYDANTIC_MODEL:
+        return lower_model(field_type).renamed(name, is_list, directives)  # type: ignore
+
+    # This error should already be caught in the resolve_type function
+    raise ValueError(f"Invalid field type: {field_type}")  # pragma: no cover
+
+
+# Printing
+
+def print_document(root: Field, indent_size: int = 4, start_indents: int = 0, strip_undersores: bool = False) -> str:
+    """Prints a lowered builder exactly like `QueryBuilder.build` builds it."""
+    if not root.selection:
+        raise ValueError("No fields were selected for the query builder. Cannot build an empty query.")
+
+    if strip_undersores:
+        root = Field(root.name, root.arguments, tuple(strip_field_name(field) for field in root.selection))
+
+    block = print_selection(root, indent_size, start_indents)
+    if root.arguments is None:
+        return block
+    return print_head(root) + " " + block
+
+
+@functools.lru_cache(maxsize=8192)
+def print_selection(field: Field, indent_size: int = 4, start_indents: int = 0) -> str:
+    """Prints the selection set of a field, e.g. `{ id name }`, with the closing
+    bracket indented by `start_indents`."""
+    if not field.selection:
+        raise ValueError("No fields were selected for the query builder.")
+
+    lines = ["{\n"]
+    for nested in field.selection:
+        lines.append(print_field(nested, indent_size, start_indents + indent_size))
+    lines.append(" " * start_indents + "}\n")
+    return "".join(lines)
+
+
+def print_field(field: Field, indent_size: int = 4, start_indents: int = 0) -> str:
+    """Prints a selected field indented by `start_indents`. Deferred fields are
+    wrapped in an inline fragment, e.g. `... @defer { field }`, as @defer can
+    only be used on fragments."""
+    whitespaces = " " * start_indents
+    deferred = tuple(directive for directive in field.directives if directive[0] == "defer")
+    if deferred:
+        others = tuple(directive for directive in field.directives if directive[0] != "defer")
+        return (
+            whitespaces + "... " + format_directives(deferred) + " {\n"
+            + print_field(field.renamed(field.name, field.is_list, others), indent_size, start_indents + indent_size)
+            + whitespaces + "}\n"
+        )
+
+    if field.selection is None:
+        return whitespaces + print_head(field) + "\n"
+    return whitespaces + print_head(field) + " " + print_selection(field, indent_size, start_indents)
+
+
+def print_head(field: Field) -> str:
+    head = field.name
+    if field.arguments is not None:
+        head += "(" + ", ".join(f"{key}: {format_argument(value)}" for key, value in field.arguments) + ")"
+    if field.directives:
+        head += " " + format_directives(field.directives)
+    return head
+
+
+def strip_field_name(field: Field) -> Field:
+    # Function names are not field names, so they are never stripped
+    if field.arguments is not None:
+        return field
+    return field.renamed(field.name.strip("_"), field.is_list)
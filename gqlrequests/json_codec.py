@@ -0,0 +1,56 @@
+"""JSON encoding and decoding used by the transports.
+
+Uses orjson when it is installed (`pip install gqlrequests[orjson]`) and the
+standard library json module otherwise. Both codecs encode to and decode from
+bytes directly, so the transports never decode response bodies to `str` first."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, NamedTuple, Union
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+JSONBytes = Union[bytes, bytearray, memoryview, str]
+
+
+class JSONCodec(NamedTuple):
+    name: str
+    dumps: Callable[..., bytes]
+    loads: Callable[[JSONBytes], Any]
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, sort_keys=sort_keys).encode()
+
+
+def _stdlib_loads(data: JSONBytes) -> Any:
+    # json.loads accepts bytes and bytearray, but not memoryview
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+STDLIB_CODEC = JSONCodec("json", _stdlib_dumps, _stdlib_loads)
+
+ORJSON_CODEC: JSONCodec | None = None
+if orjson is not None:
+    def _orjson_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+
+    ORJSON_CODEC = JSONCodec("orjson", _orjson_dumps, orjson.loads)
+
+CODECS = {codec.name: codec for codec in (STDLIB_CODEC, ORJSON_CODEC) if codec is not None}
+
+
+def get_codec(name: str | None = None) -> JSONCodec:
+    """Returns the codec with the given name ("json" or "orjson"), or the fastest
+    installed codec if no name is given."""
+    if name is None:
+        return ORJSON_CODEC or STDLIB_CODEC
+    if name not in CODECS:
+        raise ValueError(f"JSON codec {name} is not available. Available codecs: {', '.join(CODECS)}.")
+    return CODECS[name]
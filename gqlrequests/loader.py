@@ -0,0 +1,129 @@
+"""Batches function queries issued close together into a single request."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from gqlrequests.builder import FrozenQueryBuilder, QueryBuilder
+from gqlrequests.client import Client, GraphQLError
+from gqlrequests.query_creator import generate_aliased_query_string
+
+
+class BatchLoader:
+    """Collects function queries and sends them together as one aliased document.
+
+    Every call to `load` issued within the same event loop tick (or within
+    `batch_window` seconds, if set) is merged into a single request. Each caller
+    gets back the part of the response belonging to its own function query.
+    Identical function queries within a batch are only selected once. Builders
+    should not be mutated until their `load` call has returned.
+
+    Example usage:
+
+        loader = gqlrequests.BatchLoader(client, max_batch_size=50)
+        user = User(func_name="user")
+
+        anna, bob = await asyncio.gather(loader.load(user(id=1)), loader.load(user(id=2)))
+        # Sends:
+        # {
+        #     b0: user(id: 1) { ... }
+        #     b1: user(id: 2) { ... }
+        # }
+
+    """
+
+    def __init__(self, client: Client, max_batch_size: int = 100, batch_window: float = 0.0) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+
+        self._batch: Dict[str, Tuple[QueryBuilder | FrozenQueryBuilder, List[asyncio.Future]]] = {}
+        self._scheduled: asyncio.Handle | None = None
+        self._sending: Set[asyncio.Future] = set()
+
+    async def load(self, query: QueryBuilder | FrozenQueryBuilder) -> Any:
+        """Queues a function query and returns its slice of the batched response."""
+        if not query.get("build_function"):
+            raise ValueError("Only function queries can be batched. Call the builder with its arguments first.")
+        # Aliased batch documents do not declare variables
+        if query.variables():
+            raise ValueError("Queries with uploads or variables can not be batched.")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        key = query.build()
+        if key in self._batch:
+            self._batch[key][1].append(future)
+        else:
+            self._batch[key] = (query, [future])
+
+        if len(self._batch) >= self.max_batch_size:
+            self.dispatch()
+        elif self._scheduled is None:
+            if self.batch_window > 0:
+                self._scheduled = loop.call_later(self.batch_window, self.dispatch)
+            else:
+                self._scheduled = loop.call_soon(self.dispatch)
+
+        return await future
+
+    def dispatch(self) -> None:
+        """Sends the currently queued function queries without waiting for the batch window."""
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+
+        batch, self._batch = self._batch, {}
+        if batch:
+            # Keep a reference to the task so it is not garbage collected while sending
+            task = asyncio.ensure_future(self._send(list(batch.values())))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[Tuple[QueryBuilder | FrozenQueryBuilder, List[asyncio.Future]]]) -> None:
+        aliases = {f"b{i}": query for i, (query, _) in enumerate(batch)}
+        try:
+            response = await self.client.execute(generate_aliased_query_string(aliases))
+        except Exception as e:
+            for _, futures in batch:
+                resolve(futures, exception=e)
+            return
+
+        for (_, futures), (result, exception) in zip(batch, split_aliased_response(response, aliases)):
+            resolve(futures, result, exception)
+
+
+def split_aliased_response(response: Dict[str, Any], aliases: Iterable[str]) -> List[Tuple[Any, GraphQLError | None]]:
+    """Splits the response to an aliased document into the data or error of
+    every alias, in order. Errors are matched to aliases by the first element of
+    their path. Aliases missing from the data get the errors without a path."""
+    aliases = list(aliases)
+    data = response.get("data") or {}
+    errors_by_alias: Dict[str, List[Dict[str, Any]]] = {}
+    for error in response.get("errors") or []:
+        alias = (error.get("path") or [None])[0]
+        errors_by_alias.setdefault(alias if alias in aliases else "", []).append(error)
+
+    results: List[Tuple[Any, GraphQLError | None]] = []
+    for alias in aliases:
+        if errors := errors_by_alias.get(alias):
+            results.append((None, GraphQLError(errors)))
+        elif alias not in data and (errors := errors_by_alias.get("")):
+            results.append((None, GraphQLError(errors)))
+        else:
+            results.append((data.get(alias), None))
+    return results
+
+
+def resolve(futures: List[asyncio.Future], result: Any = None, exception: BaseException | None = None) -> None:
+    for future in futures:
+        if future.done():
+            continue
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
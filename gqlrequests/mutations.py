@@ -0,0 +1,177 @@
+"""Sends large numbers of mutations in aliased chunks, concurrently."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Iterable, Iterator, List, NamedTuple, Set, Tuple, Union
+
+from gqlrequests.builder import FrozenQueryBuilder, QueryBuilder
+from gqlrequests.client import Client
+from gqlrequests.loader import split_aliased_response
+from gqlrequests.query_creator import generate_aliased_query_string
+
+Mutation = Union[QueryBuilder, FrozenQueryBuilder]
+# The position of a mutation, the mutation and the size of its document in bytes
+Item = Tuple[int, Mutation, int]
+
+
+class MutationResult(NamedTuple):
+    # Named position, as NamedTuple already has an index method
+    position: int
+    mutation: Mutation
+    data: Any
+    error: BaseException | None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BulkMutator:
+    """Sends function builder mutations in chunks, each chunk as one aliased
+    mutation document, with at most `max_concurrency` chunks in flight.
+
+    Chunks hold at most `chunk_size` mutations and `max_payload_bytes` bytes of
+    document (a single larger mutation is sent in a chunk of its own). The
+    chunk size adapts to the server: it grows while chunks are answered within
+    `target_latency` seconds, and shrinks in proportion when they are slower or
+    fail, staying between `min_chunk_size` and `max_chunk_size`. The server runs
+    the mutations of a chunk one after the other, but chunks run concurrently,
+    so mutations should not depend on each other.
+
+    Every mutation gets a MutationResult with its data, or with the error it
+    failed with: a GraphQLError for errors of the mutation itself, the
+    exception the whole chunk failed with, or a ValueError for mutations that
+    can not be sent in bulk, which are skipped. Failed mutations are not retried.
+
+    Example usage:
+
+        mutator = gqlrequests.BulkMutator(client, max_concurrency=8)
+        create_user = User(fields=["id"], func_name="createUser").freeze()
+
+        results = await mutator.run(create_user(name=name) for name in names)
+        failed = [result for result in results if not result.ok]
+        # Sends chunks like:
+        # mutation {
+        #     m0: createUser(name: "Anna") { id }
+        #     m1: createUser(name: "Bob") { id }
+        # }
+
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        chunk_size: int = 50,
+        min_chunk_size: int = 1,
+        max_chunk_size: int = 1000,
+        max_payload_bytes: int = 512 * 1024,
+        target_latency: float = 2.0,
+        max_concurrency: int = 4,
+        indent_size: int = 4,
+    ) -> None:
+        if not 1 <= min_chunk_size <= chunk_size <= max_chunk_size:
+            raise ValueError("Chunk sizes must satisfy 1 <= min_chunk_size <= chunk_size <= max_chunk_size.")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        self.client = client
+        self.chunk_size = chunk_size
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.max_payload_bytes = max_payload_bytes
+        self.target_latency = target_latency
+        self.max_concurrency = max_concurrency
+        self.indent_size = indent_size
+
+    async def run(self, mutations: Iterable[Mutation]) -> List[MutationResult]:
+        """Sends every mutation and returns the results in the order of the mutations."""
+        results = [result async for result in self.stream(mutations)]
+        results.sort(key=lambda result: result.position)
+        return results
+
+    async def stream(self, mutations: Iterable[Mutation]) -> AsyncIterator[MutationResult]:
+        """Sends every mutation, yielding the results of each chunk as soon as it
+        is answered. Mutations are consumed lazily, one chunk at a time."""
+        invalid: List[MutationResult] = []
+        items = self._checked(mutations, invalid)
+        carry: List[Item] = []
+        pending: Set[asyncio.Future] = set()
+        try:
+            while True:
+                while len(pending) < self.max_concurrency and (chunk := self._next_chunk(items, carry)):
+                    pending.add(asyncio.ensure_future(self._send(chunk)))
+                # Mutations that can not be sent fail on their own, while the others are still sent
+                for result in invalid:
+                    yield result
+                invalid.clear()
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for request in done:
+                    for result in request.result():
+                        yield result
+        finally:
+            for request in pending:
+                request.cancel()
+
+    def _checked(self, mutations: Iterable[Mutation], invalid: List[MutationResult]) -> Iterator[Item]:
+        """Yields the mutations that can be sent, adding a failed result to
+        `invalid` for every other mutation."""
+        for index, mutation in enumerate(mutations):
+            try:
+                if not mutation.get("build_function"):
+                    raise ValueError("Only function builders can be sent as bulk mutations. Call the builder with its arguments first.")
+                # Aliased chunk documents do not declare variables
+                if mutation.variables():
+                    raise ValueError("Mutations with uploads or variables can not be sent as bulk mutations.")
+                # Built once here, the chunk document reuses the cached result
+                size = len(mutation.build(self.indent_size, self.indent_size).encode())
+            except ValueError as e:
+                invalid.append(MutationResult(index, mutation, None, e))
+                continue
+            yield index, mutation, size
+
+    def _next_chunk(self, items: Iterator[Item], carry: List[Item]) -> List[Item]:
+        # An item that did not fit in the previous chunk is carried over to this one
+        chunk: List[Item] = []
+        payload_bytes = 0
+        while len(chunk) < self.chunk_size and (item := carry.pop() if carry else next(items, None)) is not None:
+            if chunk and payload_bytes + item[2] > self.max_payload_bytes:
+                carry.append(item)
+                break
+            chunk.append(item)
+            payload_bytes += item[2]
+        return chunk
+
+    async def _send(self, chunk: List[Item]) -> List[MutationResult]:
+        aliases = {f"m{i}": mutation for i, (_, mutation, _) in enumerate(chunk)}
+        document = "mutation " + generate_aliased_query_string(aliases, self.indent_size)
+
+        started = time.perf_counter()
+        try:
+            response = await self.client.execute(document, operation_type="mutation")
+        except Exception as e:
+            self._adapt(len(chunk), None)
+            return [MutationResult(index, mutation, None, e) for index, mutation, _ in chunk]
+        self._adapt(len(chunk), time.perf_counter() - started)
+
+        return [
+            MutationResult(index, mutation, data, error)
+            for (index, mutation, _), (data, error) in zip(chunk, split_aliased_response(response, aliases))
+        ]
+
+    def _adapt(self, sent: int, latency: float | None) -> None:
+        """Grows the chunk size additively after fast chunks, and shrinks it in
+        proportion to the latency after slow chunks (or halves it after failures)."""
+        if latency is None:
+            chunk_size = self.chunk_size // 2
+        elif latency > self.target_latency:
+            chunk_size = int(sent * self.target_latency / latency)
+        elif sent >= self.chunk_size:
+            # Only chunks that were full say anything about whether bigger chunks would be fast enough
+            chunk_size = self.chunk_size + max(1, self.chunk_size // 4)
+        else:
+            return
+        self.chunk_size = max(self.min_chunk_size, min(self.max_chunk_size, chunk_size))
@@ -0,0 +1,221 @@
+"""Renders queries ahead of time into a manifest that is memory-mapped at runtime.
+
+At build time, `python -m gqlrequests.precompile app.queries -o queries.gqlm`
+imports the given modules and renders every public builder instance, frozen
+builder and builder class defined in them. At runtime, workers open the
+manifest with `Manifest`, which memory-maps the file and looks documents up
+through an on-disk hash table, so nothing is parsed or rendered at startup.
+
+Builders are rendered as queries. Modules mark mutations and subscriptions
+in an `__operation_types__` mapping of attribute names to operation types:
+
+    create_user = User(fields=["id"], func_name="createUser")(name="Luke")
+    __operation_types__ = {"create_user": "mutation"}
+
+Manifest layout (little endian):
+
+    header   magic "GQLM", version (u16), reserved (u16), entries (u32), slots (u32)
+    slots    key hash (u64), name offset (u32), name length (u32),
+             document offset (u32), document length (u32), sha256 digest (32 bytes)
+    data     utf-8 encoded names and documents
+
+The number of slots is a power of two at least twice the number of entries.
+Entries are placed by linear probing from `key hash & (slots - 1)`, and empty
+slots have a name offset of 0.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping
+from types import ModuleType
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence
+
+from gqlrequests.builder import FrozenQueryBuilder, QueryBuilder
+from gqlrequests.client import build_document
+
+MAGIC = b"GQLM"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+SLOT = struct.Struct("<QIIII32s")
+
+
+class ManifestEntry(NamedTuple):
+    name: str
+    document: str
+    sha256: str
+
+
+def discover(module: ModuleType) -> Dict[str, QueryBuilder | FrozenQueryBuilder]:
+    """Returns the public builders of a module by their qualified name. Builder
+    instances and frozen builders are used as they are, and builder classes
+    defined in the module are used as templates with all of their fields.
+    Classes without fields, e.g. base classes, are skipped."""
+    builders: Dict[str, QueryBuilder | FrozenQueryBuilder] = {}
+    for attribute, value in vars(module).items():
+        if attribute.startswith("_"):
+            continue
+        name = f"{module.__name__}.{attribute}"
+        if isinstance(value, (QueryBuilder, FrozenQueryBuilder)):
+            builders[name] = value
+        elif isinstance(value, type) and issubclass(value, QueryBuilder) and value.__module__ == module.__name__:
+            if getattr(value, "_resolved_fields", None):
+                builders[name] = value()
+    return builders
+
+
+def precompile(module_names: Iterable[str], indent_size: int = 4) -> Dict[str, str]:
+    """Imports the modules and renders the documents of all builders found in them,
+    as the operation types given in the `__operation_types__` of the modules."""
+    documents: Dict[str, str] = {}
+    for module_name in module_names:
+        module = importlib.import_module(module_name)
+        operation_types: Mapping[str, str] = getattr(module, "__operation_types__", {})
+        for name, builder in discover(module).items():
+            operation_type = operation_types.get(name.rpartition(".")[2], "query")
+            documents[name] = build_document(builder, indent_size, operation_type)
+    return documents
+
+
+def key_hash(name: bytes) -> int:
+    # The builtin hash is salted per process, so the table needs a stable hash
+    return int.from_bytes(hashlib.blake2b(name, digest_size=8).digest(), "little")
+
+
+def write_manifest(path: str | os.PathLike, documents: Mapping[str, str]) -> None:
+    """Writes the documents to a manifest file. The file is replaced atomically,
+    so workers that already mapped the old manifest keep reading it."""
+    slot_count = 1
+    while slot_count < 2 * len(documents):
+        slot_count *= 2
+
+    slots = [SLOT.pack(0, 0, 0, 0, 0, bytes(32))] * slot_count
+    data = bytearray()
+    data_start = HEADER.size + SLOT.size * slot_count
+    for name, document in documents.items():
+        encoded_name = name.encode()
+        encoded_document = document.encode()
+        name_offset = data_start + len(data)
+        data += encoded_name
+        document_offset = data_start + len(data)
+        data += encoded_document
+
+        hashed = key_hash(encoded_name)
+        index = hashed & (slot_count - 1)
+        while slots[index][8:12] != bytes(4):
+            index = (index + 1) & (slot_count - 1)
+        slots[index] = SLOT.pack(
+            hashed,
+            name_offset,
+            len(encoded_name),
+            document_offset,
+            len(encoded_document),
+            hashlib.sha256(encoded_document).digest(),
+        )
+
+    temporary_path = f"{os.fspath(path)}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(documents), slot_count))
+        file.writelines(slots)
+        file.write(data)
+    os.replace(temporary_path, path)
+
+
+class Manifest(Mapping):
+    """A read-only mapping of names to prebuilt documents, backed by a memory-mapped
+    manifest file. Opening the manifest only reads its header, and every lookup
+    reads a few slots and the document itself, so startup cost does not grow with
+    the number of documents.
+
+    Example usage:
+
+        queries = Manifest("queries.gqlm")
+        response = await client.execute(queries["app.queries.get_character"], {"name": "Luke"})
+
+    """
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < HEADER.size:
+            self._map.close()
+            raise ValueError(f"{os.fspath(path)} is not a gqlrequests manifest.")
+        magic, version, _, self._length, self._slot_count = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{os.fspath(path)} is not a version {VERSION} gqlrequests manifest.")
+
+    def entry(self, name: str) -> ManifestEntry | None:
+        """Returns the document and its sha256 digest (as used by persisted queries),
+        or None if there is no document with the name."""
+        encoded_name = name.encode()
+        hashed = key_hash(encoded_name)
+        index = hashed & (self._slot_count - 1)
+        while True:
+            slot_hash, name_offset, name_length, document_offset, document_length, digest = SLOT.unpack_from(
+                self._map, HEADER.size + SLOT.size * index
+            )
+            if name_offset == 0:
+                return None
+            if slot_hash == hashed and self._map[name_offset:name_offset + name_length] == encoded_name:
+                document = self._map[document_offset:document_offset + document_length].decode()
+                return ManifestEntry(name, document, digest.hex())
+            index = (index + 1) & (self._slot_count - 1)
+
+    def __getitem__(self, name: str) -> str:
+        found = self.entry(name)
+        if found is None:
+            raise KeyError(name)
+        return found.document
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self._slot_count):
+            _, name_offset, name_length, _, _, _ = SLOT.unpack_from(self._map, HEADER.size + SLOT.size * index)
+            if name_offset != 0:
+                yield self._map[name_offset:name_offset + name_length].decode()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> Manifest:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="gqlrequests-precompile",
+        description="Renders the query builders of the given modules into a manifest file.",
+    )
+    parser.add_argument("modules", nargs="+", help="modules to import and search for query builders")
+    parser.add_argument("-o", "--output", default="queries.gqlm", help="manifest file to write (default: queries.gqlm)")
+    parser.add_argument("--indent", type=int, default=4, help="number of spaces to indent documents with (default: 4)")
+    arguments = parser.parse_args(argv)
+
+    # Modules are imported the same way `python -m` would import them
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    documents = precompile(arguments.modules, arguments.indent)
+    write_manifest(arguments.output, documents)
+    names: List[str] = sorted(documents)
+    for name in names:
+        print(f"{hashlib.sha256(documents[name].encode()).hexdigest()[:12]}  {name}")
+    print(f"Wrote {len(documents)} documents to {arguments.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,12 +8,13 @@ from typing import TYPE_CHECKING, Dict, List, Tuple, Type, Union, _GenericAlias
 from pydantic import BaseModel
 
 import gqlrequests
+from gqlrequests.upload import Upload, Variable
 
 if sys.version_info >= (3, 9):
     from typing import GenericAlias  # type: ignore
 
 if TYPE_CHECKING:
-    from gqlrequests.builder import QueryBuilder  # pragma: no cover
+    from gqlrequests.builder import FrozenQueryBuilder, QueryBuilder  # pragma: no cover
 
 
 class FieldTypeEnum(enum.Enum):
@@ -24,45 +25,83 @@ class FieldTypeEnum(enum.Enum):
     PYDANTIC_MODEL = 5
 
 Primitives = Union[int, float, str, bool]
+# A directive name and its arguments, e.g. ("stream", (("initialCount", 2),))
+Directive = Tuple[str, Tuple[Tuple[str, Primitives], ...]]
 # Pipe operator union does not support deferred string type evaluation apparently
-ValidFieldTypes = Union[Primitives, enum.EnumMeta, "QueryBuilder", Type["QueryBuilder"], Type[BaseModel], List["ValidFieldTypes"]]
+ValidFieldTypes = Union[
+    Primitives, enum.EnumMeta, "QueryBuilder", "FrozenQueryBuilder", Type["QueryBuilder"], Type[BaseModel], List["ValidFieldTypes"]
+]
 
-def generate_function_query_string(func_name: str, args: Dict[str, Primitives], fields: Dict[str, ValidFieldTypes], indent_size: int = 4, start_indents: int = 0) -> str:
+def generate_function_query_string(func_name: str, args: Dict[str, Primitives], fields: Dict[str, ValidFieldTypes], indent_size: int = 4, start_indents: int = 0, directives: Dict[str, Tuple[Directive, ...]] | None = None) -> str:
     """Generates a GraphQL query string for a function with arguments."""
     query_string = func_name + "("
-
-    processed_args = []
-    for key, value in args.items():
-        if isinstance(value, str):
-            processed_args.append(f"{key}: \"{value}\"")
-        elif isinstance(value, bool):
-            processed_args.append(f"{key}: {str(value).lower()}")
-        else:
-            processed_args.append(f"{key}: {value}")
-    return query_string + ", ".join(processed_args) + ") " + generate_query_string(fields, indent_size, start_indents)
-
-def generate_query_string(fields: Dict[str, ValidFieldTypes], indent_size: int = 4, start_indents: int = 0) -> str:
+    processed_args = [f"{key}: {format_argument(value)}" for key, value in args.items()]
+    return query_string + ", ".join(processed_args) + ") " + generate_query_string(fields, indent_size, start_indents, directives)
+
+def format_argument(value: Primitives | Upload | Variable) -> str:
+    """Formats a function argument value as a GraphQL literal."""
+    if isinstance(value, Upload):
+        return f"${value.variable}"
+    if isinstance(value, Variable):
+        return f"${value.name}"
+    if isinstance(value, str):
+        return f"\"{value}\""
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+def format_directives(directives: Tuple[Directive, ...]) -> str:
+    """Formats directives, e.g. `@defer(label: "slow") @include(if: true)`."""
+    formatted = []
+    for name, args in directives:
+        processed_args = ", ".join(f"{key}: {format_argument(value)}" for key, value in args)
+        formatted.append(f"@{name}({processed_args})" if args else f"@{name}")
+    return " ".join(formatted)
+
+def generate_query_string(fields: Dict[str, ValidFieldTypes], indent_size: int = 4, start_indents: int = 0, directives: Dict[str, Tuple[Directive, ...]] | None = None) -> str:
     """Generates a GraphQL query string based on the fields set in the builder."""
     if len(fields.keys()) == 0:
         raise ValueError("No fields were selected for the query builder.")
     build_output = "{\n"
-    build_output += generate_fields(fields, indent_size, start_indents)
+    build_output += generate_fields(fields, indent_size, start_indents, directives)
     build_output += " " * start_indents + "}\n"
     return build_output
 
-def generate_fields(fields: Dict[str, ValidFieldTypes], indent_size: int = 4, start_indents: int = 0) -> str:
-    """Generates a string of the fields of a GraphQL query."""
+def generate_aliased_query_string(selections: Dict[str, QueryBuilder | FrozenQueryBuilder], indent_size: int = 4) -> str:
+    """Generates a single GraphQL query string selecting every function builder
+    under its own alias, e.g. `{ u0: user(id: 1) { ... } u1: user(id: 2) { ... } }`."""
+    if len(selections.keys()) == 0:
+        raise ValueError("No selections were given for the aliased query.")
+    build_output = "{\n"
+    for alias, builder in selections.items():
+        if not builder.get("build_function"):
+            raise ValueError(f"Cannot alias {type(builder).__name__} as {alias}. Only function queries can be aliased.")
+        build_output += " " * indent_size + alias + ": " + builder.build(indent_size, indent_size)
+    build_output += "}\n"
+    return build_output
+
+def generate_fields(fields: Dict[str, ValidFieldTypes], indent_size: int = 4, start_indents: int = 0, directives: Dict[str, Tuple[Directive, ...]] | None = None) -> str:
+    """Generates a string of the fields of a GraphQL query. Fields with
+    directives, e.g. `@stream` or `@defer`, are rendered with them."""
     string_output = ""
     whitespaces = " " * start_indents + " " * indent_size
+    directives = directives or {}
     
     for field, field_type_hint in fields.items():
         field_type_type, field_type = resolve_type(field_type_hint)
 
-        if field_type_type in {FieldTypeEnum.PRIMITIVE, FieldTypeEnum.ENUM}:
+        if field in directives:
+            # Rare enough that lowering the field instead of using the nested build caches is fine
+            lowered_field = gqlrequests.ir.lower_field(field, field_type_hint, field_type_hint, directives[field])
+            string_output += gqlrequests.ir.print_field(lowered_field, indent_size, len(whitespaces))
+
+        elif field_type_type in {FieldTypeEnum.PRIMITIVE, FieldTypeEnum.ENUM}:
             string_output += whitespaces + field + "\n"
         
         elif field_type_type == FieldTypeEnum.QUERY_BUILDER_CLASS:
-            string_output += whitespaces + field + " " + field_type().build(indent_size, len(whitespaces))  # type: ignore
+            # Builder classes are lowered once, instead of instantiated and built every time
+            lowered_class = gqlrequests.ir.lower_class(field_type)  # type: ignore
+            string_output += whitespaces + field + " " + gqlrequests.ir.print_selection(lowered_class, indent_size, len(whitespaces))
 
         elif field_type_type == FieldTypeEnum.QUERY_BUILDER_INSTANCE:
             if field_type.get("build_function"):  # type: ignore
@@ -71,7 +110,8 @@ def generate_fields(fields: Dict[str, ValidFieldTypes], indent_size: int = 4, st
                 string_output += whitespaces + field + " " + field_type.build(indent_size, len(whitespaces))  # type: ignore
 
         elif field_type_type == FieldTypeEnum.PYDANTIC_MODEL:
-            string_output += whitespaces + field + " " + generate_query_string(field_type.__annotations__, indent_size, len(whitespaces))
+            lowered_model = gqlrequests.ir.lower_model(field_type)  # type: ignore
+            string_output += whitespaces + field + " " + gqlrequests.ir.print_selection(lowered_model, indent_size, len(whitespaces))
 
         else:
             # This error should already be caught in the resolve_type function
@@ -91,32 +131,36 @@ def resolve_type(type_hint: ValidFieldTypes) -> Tuple[FieldTypeEnum, ValidFieldT
         not inspect.isclass(type_hint) and isinstance(type_hint, enum.Enum):
         return (FieldTypeEnum.ENUM, type_hint)
     
-    # list[] in python 3.8 is NOT a class, but an instance of _GenericAlias
-    # list[] in python 3.10 is the class AND an instance of GenericAlias (???? 
-    #   inspect.isclass(list[int]) and isinstance(list[int], GenericAlias) == True)
-    # list[] in python 3.12 is NOT a class, but an instance of GenericAlias...
-    is_generic_alias = False
-    if sys.version_info >= (3, 9):
-        is_generic_alias = isinstance(type_hint, GenericAlias) or isinstance(type_hint, _GenericAlias)
-    else:
-        is_generic_alias = isinstance(type_hint, _GenericAlias)  # pragma: no cover
-
-    is_generic_alias_list = bool(is_generic_alias and type_hint.__origin__ == list)  # type: ignore
-    is_just_list = bool(inspect.isclass(type_hint) and type_hint == list)
-
-    if is_generic_alias_list or is_just_list:
+    if is_list_type(type_hint):
         return resolve_type(type_hint.__args__[0])  # type: ignore
 
     # QueryBuilder class
     if inspect.isclass(type_hint) and issubclass(type_hint, gqlrequests.builder.QueryBuilder):
         return (FieldTypeEnum.QUERY_BUILDER_CLASS, type_hint)
     
-    # QueryBuilder instance
-    if not inspect.isclass(type_hint) and isinstance(type_hint, gqlrequests.builder.QueryBuilder):
+    # QueryBuilder instance or snapshot
+    builder_instance_types = (gqlrequests.builder.QueryBuilder, gqlrequests.builder.FrozenQueryBuilder)
+    if not inspect.isclass(type_hint) and isinstance(type_hint, builder_instance_types):
         return (FieldTypeEnum.QUERY_BUILDER_INSTANCE, type_hint)
     
     # BaseModel
     if inspect.isclass(type_hint) and issubclass(type_hint, BaseModel):
         return (FieldTypeEnum.PYDANTIC_MODEL, type_hint)
     
-    raise ValueError(f"Invalid field type: {type_hint}")
\ No newline at end of file
+    raise ValueError(f"Invalid field type: {type_hint}")
+
+def is_list_type(type_hint: ValidFieldTypes) -> bool:
+    """Checks if the type hint is a list, e.g. `List[int]` or `list[int]`."""
+    # list[] in python 3.8 is NOT a class, but an instance of _GenericAlias
+    # list[] in python 3.10 is the class AND an instance of GenericAlias (???? 
+    #   inspect.isclass(list[int]) and isinstance(list[int], GenericAlias) == True)
+    # list[] in python 3.12 is NOT a class, but an instance of GenericAlias...
+    is_generic_alias = False
+    if sys.version_info >= (3, 9):
+        is_generic_alias = isinstance(type_hint, GenericAlias) or isinstance(type_hint, _GenericAlias)
+    else:
+        is_generic_alias = isinstance(type_hint, _GenericAlias)  # pragma: no cover
+
+    is_generic_alias_list = bool(is_generic_alias and type_hint.__origin__ == list)  # type: ignore
+    is_just_list = bool(inspect.isclass(type_hint) and type_hint == list)
+    return is_generic_alias_list or is_just_list
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""Retries with jittered backoff and hedged requests, used by the client for queries."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Set, Tuple, Type
+
+from gqlrequests.transport import TransportError
+
+TOO_MANY_REQUESTS = 429
+SERVER_ERROR_STATUS = 500
+
+
+class RetryPolicy:
+    """Decides whether and when a failed query is sent again.
+
+    Attempt `n` (starting from 0) waits a random delay between 0 and
+    `min(max_delay, base_delay * 2 ** n)` ("full jitter"), so clients that failed
+    at the same time do not retry at the same time. Connection errors, timeouts,
+    status 429 and 5xx statuses are retried. Mutations are never retried.
+
+    Example usage:
+
+        client = gqlrequests.Client(transport, retry=RetryPolicy(attempts=4, base_delay=0.05))
+
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 2.0,
+        retry_on: Tuple[Type[BaseException], ...] = (TransportError, asyncio.TimeoutError, OSError),
+    ) -> None:
+        if attempts < 1:
+            raise ValueError("A retry policy needs at least one attempt.")
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+
+    def should_retry(self, exception: BaseException) -> bool:
+        if not isinstance(exception, self.retry_on):
+            return False
+        if isinstance(exception, TransportError) and exception.status is not None:
+            return exception.status == TOO_MANY_REQUESTS or exception.status >= SERVER_ERROR_STATUS
+        return True
+
+    def delay(self, attempt: int) -> float:
+        """Returns how long to wait before sending attempt `attempt + 1`."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class LatencyTracker:
+    """Keeps the latencies of the last `window` successful requests per operation.
+    The client keys queries without a function name by their document, so at
+    most `max_operations` operations are kept, forgetting the least recently
+    recorded one first."""
+
+    def __init__(self, window: int = 200, max_operations: int = 1000) -> None:
+        self.window = window
+        self.max_operations = max_operations
+        self._latencies: OrderedDict[str, Deque[float]] = OrderedDict()
+
+    def record(self, operation: str, seconds: float) -> None:
+        if (latencies := self._latencies.get(operation)) is None:
+            latencies = self._latencies[operation] = deque(maxlen=self.window)
+            if len(self._latencies) > self.max_operations:
+                self._latencies.popitem(last=False)
+        else:
+            self._latencies.move_to_end(operation)
+        latencies.append(seconds)
+
+    def samples(self, operation: str) -> int:
+        return len(self._latencies.get(operation, ()))
+
+    def percentile(self, operation: str, percentile: float) -> float | None:
+        """Returns the latency below which `percentile` (between 0 and 1) of the
+        recorded requests finished, or None if nothing was recorded."""
+        latencies = self._latencies.get(operation)
+        if not latencies:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+
+class HedgePolicy:
+    """Sends a duplicate of a query that has not been answered within the
+    `percentile` latency of its operation, and uses whichever answer arrives
+    first. Up to `max_hedges` duplicates are sent, one per threshold passed.
+    Nothing is hedged until `min_samples` latencies have been recorded for the
+    operation, unless a fixed `delay` is given.
+
+    Example usage:
+
+        client = gqlrequests.Client(transport, hedge=HedgePolicy(percentile=0.95))
+
+    """
+
+    def __init__(
+        self, percentile: float = 0.95, min_samples: int = 20, max_hedges: int = 1, delay: float | None = None
+    ) -> None:
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_hedges = max_hedges
+        self.delay = delay
+
+    def threshold(self, latencies: LatencyTracker, operation: str) -> float | None:
+        """Returns how long to wait before hedging, or None if the operation should not be hedged."""
+        if self.delay is not None:
+            return self.delay
+        if latencies.samples(operation) < self.min_samples:
+            return None
+        return latencies.percentile(operation, self.percentile)
+
+
+async def hedged(send: Callable[[], Awaitable[Any]], threshold: float | None, max_hedges: int) -> Any:
+    """Awaits `send()`, calling it again whenever no answer has arrived within
+    `threshold` seconds (at most `max_hedges` more times). Returns the first
+    successful answer, and raises the last error if every request failed.
+    Requests that are still running when an answer arrives are cancelled."""
+    pending: Set[asyncio.Future] = {asyncio.ensure_future(send())}
+    if threshold is None:
+        return await next(iter(pending))
+
+    hedges = 0
+    try:
+        while True:
+            timeout = threshold if hedges < max_hedges else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                pending.add(asyncio.ensure_future(send()))
+                hedges += 1
+                continue
+
+            failed = None
+            for request in done:
+                if request.exception() is None:
+                    return request.result()
+                failed = request
+            if not pending and failed is not None:
+                return failed.result()
+    finally:
+        for request in pending:
+            request.cancel()
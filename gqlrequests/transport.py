@@ -0,0 +1,293 @@
+"""Transports used by the client to send GraphQL documents to a server.
+
+A transport is any async callable taking a document string and an optional
+variables dict, and returning the decoded JSON response. The HTTP transport
+in this module only depends on the standard library. Variables containing
+uploads are sent as multipart requests (see `gqlrequests.upload`)."""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import ssl
+import zlib
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from gqlrequests.incremental import INCREMENTAL_ACCEPT, MultipartMixedParser, merge_payload, multipart_boundary
+from gqlrequests.json_codec import JSONCodec, get_codec
+from gqlrequests.upload import MultipartBody, Upload, extract_files
+
+Transport = Callable[[str, Optional[Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+
+HTTP_ERROR_STATUS = 400
+READ_SIZE = 64 * 1024
+# Makes zlib expect a gzip header and trailer
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class TransportError(Exception):
+    """Raised when the server could not be reached or answered with an error status."""
+
+    def __init__(self, message: str, status: int | None = None, body: bytes = b"") -> None:
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+class HTTPTransport:
+    """Sends GraphQL documents as JSON POST requests over HTTP/1.1.
+
+    JSON is encoded and decoded with `json_codec`, which defaults to orjson
+    when it is installed and the standard library json module otherwise.
+
+    Unless `decompress` is False, gzip and deflate compressed responses are
+    accepted, and decompressed while they are read. Request bodies of at least
+    `compress_threshold` bytes are sent gzip compressed. Smaller bodies (and all
+    bodies if the threshold is None) are sent as they are, as compressing small
+    documents costs more time than it saves.
+
+    Example usage:
+
+        transport = HTTPTransport("https://example.com/graphql", headers={"Authorization": "Bearer ..."})
+        client = gqlrequests.Client(transport)
+
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: Dict[str, str] | None = None,
+        timeout: float | None = None,
+        json_codec: JSONCodec | None = None,
+        decompress: bool = True,
+        compress_threshold: int | None = None,
+        compress_level: int = 6,
+    ) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in {"http", "https"}:
+            raise ValueError(f"Unsupported URL scheme for HTTPTransport: {parts.scheme!r}")
+        if not parts.hostname:
+            raise ValueError(f"URL is missing a host: {url!r}")
+
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.ssl = parts.scheme == "https"
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.json_codec = json_codec or get_codec()
+        self.decompress = decompress
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    async def __call__(self, document: str, variables: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        body = self.encode(document, variables)
+        status, headers, response_body = await asyncio.wait_for(self.post(body), self.timeout)
+
+        # Incremental responses to queries with @defer or @stream fields are merged into one result
+        if (boundary := multipart_boundary(headers)) is not None and status < HTTP_ERROR_STATUS:
+            result: Dict[str, Any] = {}
+            for part in MultipartMixedParser(boundary).feed(response_body):
+                merge_payload(result, self.decode(status, part))
+            return result
+        return self.decode(status, response_body)
+
+    async def stream(self, document: str, variables: Dict[str, Any] | None = None) -> AsyncIterator[Dict[str, Any]]:
+        """Sends the document and yields the payloads of an incremental
+        (`multipart/mixed`) response as they arrive. Other responses are
+        yielded as a single payload. See `gqlrequests.incremental`."""
+        reader, writer = await asyncio.wait_for(self.send(self.encode(document, variables)), self.timeout)
+        try:
+            status, headers = await asyncio.wait_for(read_response_head(reader), self.timeout)
+            boundary = multipart_boundary(headers)
+            if boundary is None or status >= HTTP_ERROR_STATUS:
+                yield self.decode(status, await read_response_body(reader, headers))
+                return
+
+            parser = MultipartMixedParser(boundary)
+            decoder = ContentDecoder(headers.get("content-encoding", ""))
+            async for chunk in iter_response_body(reader, headers):
+                for part in parser.feed(decoder.decompress(chunk)):
+                    yield self.decode(status, part)
+        finally:
+            writer.close()
+
+    def encode(self, document: str, variables: Dict[str, Any] | None) -> bytes | MultipartBody:
+        """Encodes the request body, as JSON or as a multipart body if the variables contain uploads."""
+        payload: Dict[str, Any] = {"query": document}
+        files: Dict[str, Upload] = {}
+        if variables is not None:
+            payload["variables"], files = extract_files(variables)
+
+        operations = self.json_codec.dumps(payload)
+        return MultipartBody(operations, files, self.json_codec.dumps) if files else operations
+
+    def decode(self, status: int, body: bytes) -> Dict[str, Any]:
+        """Decodes a JSON response body, raising TransportError for error statuses."""
+        if status >= HTTP_ERROR_STATUS:
+            raise TransportError(f"Server responded with status {status}.", status, body)
+        try:
+            return self.json_codec.loads(body)
+        except ValueError as e:
+            raise TransportError("Server response is not valid JSON.", status, body) from e
+
+    async def post(self, body: bytes | MultipartBody) -> Tuple[int, Dict[str, str], bytes]:
+        """Sends a POST request with the given JSON body (or multipart body with
+        files, which is streamed) and returns the status, headers (with
+        lowercased names) and body of the response."""
+        reader, writer = await self.send(body)
+        try:
+            status, headers = await read_response_head(reader)
+            return status, headers, await read_response_body(reader, headers)
+        finally:
+            writer.close()
+
+    async def send(self, body: bytes | MultipartBody) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Opens a connection and sends a POST request with the body, returning
+        the connection for reading the response."""
+        try:
+            reader, writer = await asyncio.open_connection(
+                self.host, self.port, ssl=ssl.create_default_context() if self.ssl else None
+            )
+        except OSError as e:
+            raise TransportError(f"Could not connect to {self.url}: {e}") from e
+
+        try:
+            if isinstance(body, MultipartBody):
+                writer.write(self.request_head(len(body), body.content_type))
+                await body.write_to(writer)
+            elif self.compress_threshold is not None and len(body) >= self.compress_threshold:
+                body = gzip.compress(body, self.compress_level)
+                writer.write(self.request_head(len(body), content_encoding="gzip") + body)
+            else:
+                writer.write(self.request_head(len(body)) + body)
+            await writer.drain()
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    def request_head(
+        self, content_length: int, content_type: str = "application/json", content_encoding: str | None = None
+    ) -> bytes:
+        lines = [
+            f"POST {self.path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Type: {content_type}",
+            f"Accept: application/json, {INCREMENTAL_ACCEPT}",
+            f"Content-Length: {content_length}",
+            "Connection: close",
+        ]
+        if self.decompress:
+            lines.append("Accept-Encoding: gzip, deflate")
+        if content_encoding is not None:
+            lines.append(f"Content-Encoding: {content_encoding}")
+        lines += [f"{name}: {value}" for name, value in self.headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def read_response_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+    """Reads the status line and headers of an HTTP/1.1 response."""
+    status_line = await reader.readline()
+    version, _, rest = status_line.partition(b" ")
+    if not version.startswith(b"HTTP/") or not rest[:3].isdigit():
+        raise TransportError(f"Malformed HTTP status line: {status_line!r}")
+    status = int(rest[:3])
+
+    headers: Dict[str, str] = {}
+    while (line := await reader.readline()) not in {b"\r\n", b"\n", b""}:
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers
+
+
+async def read_response_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+    """Reads a whole HTTP/1.1 response body, handling chunked transfer encoding
+    and decompressing gzip or deflate content encoding as the body arrives."""
+    decoder = ContentDecoder(headers.get("content-encoding", ""))
+    chunks: List[bytes] = []
+    async for chunk in iter_response_body(reader, headers):
+        chunks.append(decoder.decompress(chunk))
+    chunks.append(decoder.flush())
+    return b"".join(chunks)
+
+
+async def iter_response_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> AsyncIterator[bytes]:
+    """Yields the (still encoded) body of an HTTP/1.1 response as it arrives."""
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while (size := await read_chunk_size(reader)) > 0:
+            try:
+                chunk = await reader.readexactly(size)
+            except asyncio.IncompleteReadError as e:
+                raise TransportError("Connection closed before the whole response body was received.") from e
+            yield chunk
+            await reader.readline()
+        return
+
+    if "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining > 0:
+            chunk = await reader.read(min(remaining, READ_SIZE))
+            if not chunk:
+                raise TransportError("Connection closed before the whole response body was received.")
+            remaining -= len(chunk)
+            yield chunk
+        return
+
+    while chunk := await reader.read(READ_SIZE):
+        yield chunk
+
+
+async def read_chunk_size(reader: asyncio.StreamReader) -> int:
+    line = await reader.readline()
+    if not line:
+        raise TransportError("Connection closed before the whole response body was received.")
+    try:
+        return int(line.split(b";")[0], 16)
+    except ValueError:
+        raise TransportError(f"Malformed chunk size line: {line!r}") from None
+
+
+class ContentDecoder:
+    """Incrementally decompresses a body with the given Content-Encoding
+    ("gzip", "deflate" or "identity"), so a compressed body never has to be
+    held in memory in full before it is decompressed."""
+
+    def __init__(self, content_encoding: str) -> None:
+        self.content_encoding = content_encoding.strip().lower()
+        if self.content_encoding in {"gzip", "x-gzip"}:
+            self._decompressor: Any = zlib.decompressobj(GZIP_WBITS)
+        elif self.content_encoding == "deflate":
+            self._decompressor = zlib.decompressobj(zlib.MAX_WBITS)
+        elif self.content_encoding in {"", "identity"}:
+            self._decompressor = None
+        else:
+            raise TransportError(f"Unsupported response content encoding: {content_encoding!r}")
+        self._first_chunk = True
+
+    def decompress(self, chunk: bytes) -> bytes:
+        if self._decompressor is None:
+            return chunk
+        try:
+            return self._decompress(chunk)
+        except zlib.error as e:
+            raise TransportError(f"Could not decompress {self.content_encoding} response: {e}") from e
+
+    def _decompress(self, chunk: bytes) -> bytes:
+        if not self._first_chunk or self.content_encoding != "deflate":
+            return self._decompressor.decompress(chunk)
+
+        # Some servers send raw deflate data without the zlib header that "deflate" requires
+        self._first_chunk = False
+        try:
+            return self._decompressor.decompress(chunk)
+        except zlib.error:
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._decompressor.decompress(chunk)
+
+    def flush(self) -> bytes:
+        if self._decompressor is None:
+            return b""
+        return self._decompressor.flush()
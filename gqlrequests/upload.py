@@ -0,0 +1,187 @@
+"""File uploads following the GraphQL multipart request specification.
+
+Files are passed to function builders as `Upload` arguments, which are
+rendered as variables (`uploadPhoto(photo: $photo)`). The HTTP transport then
+sends the request as `multipart/form-data`, streaming every file from disk in
+chunks, so the memory used does not depend on the size of the files.
+
+Frozen builders never hold uploads, as they are used as cache keys. Freezing
+a builder replaces its uploads with `Variable` placeholders, and uploads for
+frozen builders are passed in the variables of the request instead.
+
+See https://github.com/jaydenseric/graphql-multipart-request-spec
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import mmap
+import os
+import secrets
+from typing import IO, Any, Dict, Iterator, List, NamedTuple, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class Upload:
+    """A file to upload, given as a path or a binary file object. File objects are
+    read from their current position. Paths are opened when the request is sent.
+
+    Uploads are rendered as `$variable` arguments. The variable is named after
+    the argument the upload is passed as, unless `variable` is given. Passing
+    the same file under one variable name twice in a query is fine, but
+    different files need different names.
+
+    Example usage:
+
+        upload_photo = Photo(func_name="uploadPhoto")(photo=Upload("luke.png", content_type="image/png"))
+        response = await client.execute(upload_photo, operation_type="mutation")
+
+    """
+
+    def __init__(
+        self,
+        file: str | os.PathLike | IO[bytes],
+        filename: str | None = None,
+        content_type: str = "application/octet-stream",
+        variable: str | None = None,
+    ) -> None:
+        self.file = file
+        if filename is None:
+            name = file if isinstance(file, (str, os.PathLike)) else getattr(file, "name", "upload")
+            filename = os.path.basename(os.fspath(name)) if isinstance(name, (str, os.PathLike)) else "upload"
+        self.filename = filename
+        self.content_type = content_type
+        self.variable = variable
+
+    def __repr__(self) -> str:
+        return f"Upload({self.filename!r}, variable={self.variable!r})"
+
+    def named(self, variable: str) -> Upload:
+        """Returns this upload if its variable is named already, or else a copy of
+        it named `variable`, so uploads passed to builders are never changed."""
+        if self.variable is not None:
+            return self
+        return Upload(self.file, self.filename, self.content_type, variable)
+
+    def size(self) -> int:
+        """Returns the number of bytes that will be sent."""
+        if isinstance(self.file, (str, os.PathLike)):
+            return os.path.getsize(self.file)
+        position = self.file.tell()
+        try:
+            return os.fstat(self.file.fileno()).st_size - position
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            end = self.file.seek(0, io.SEEK_END)
+            self.file.seek(position)
+            return end - position
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Yields the contents of the file in chunks of at most `chunk_size` bytes.
+        Regular files are memory-mapped, other file objects are read in chunks."""
+        if isinstance(self.file, (str, os.PathLike)):
+            with open(self.file, "rb") as file:
+                yield from read_chunks(file, chunk_size)
+        else:
+            yield from read_chunks(self.file, chunk_size)
+
+
+class Variable(NamedTuple):
+    """A `$variable` argument of the given GraphQL type, e.g. `Variable("photo", "Upload!")`.
+
+    Example usage:
+
+        upload_photo = Photo(func_name="uploadPhoto").freeze()(photo=Variable("photo", "Upload!"))
+        response = await client.execute(upload_photo, {"photo": Upload("luke.png")}, operation_type="mutation")
+
+    """
+
+    name: str
+    type: str
+
+
+def read_chunks(file: IO[bytes], chunk_size: int) -> Iterator[bytes]:
+    position = file.tell()
+    try:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        # Not a regular file (or an empty one), so it can not be mapped
+        while chunk := file.read(chunk_size):
+            yield chunk
+        return
+
+    # Slicing copies a single chunk, which the transport may hold on to until it is sent
+    with mapped:
+        for start in range(position, len(mapped), chunk_size):
+            yield mapped[start:start + chunk_size]
+        file.seek(len(mapped))
+
+
+def extract_files(value: Any, path: str = "variables") -> Tuple[Any, Dict[str, Upload]]:
+    """Replaces every Upload in the variables with None, as required by the
+    multipart request specification. Returns the new variables and the uploads
+    by their object path, e.g. `{"variables.photos.0": Upload(...)}`."""
+    files: Dict[str, Upload] = {}
+
+    def replace(value: Any, path: str) -> Any:
+        if isinstance(value, Upload):
+            files[path] = value
+            return None
+        if isinstance(value, dict):
+            return {key: replace(item, f"{path}.{key}") for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [replace(item, f"{path}.{index}") for index, item in enumerate(value)]
+        return value
+
+    return replace(value, path), files
+
+
+class MultipartBody:
+    """A `multipart/form-data` request body with an `operations` part, a `map`
+    part and one part per file. The length is known up front, so the body can be
+    sent with a Content-Length header while the files are streamed."""
+
+    def __init__(self, operations: bytes, files: Dict[str, Upload], json_dumps: Any) -> None:
+        self.boundary = secrets.token_hex(16)
+        self.files = list(files.values())
+        file_map = {str(index): [path] for index, path in enumerate(files)}
+        self._parts: List[bytes] = [
+            self._part_head("operations") + operations + b"\r\n",
+            self._part_head("map") + json_dumps(file_map) + b"\r\n",
+        ]
+        self._file_heads = [
+            self._part_head(str(index), upload.filename, upload.content_type) for index, upload in enumerate(self.files)
+        ]
+        self._tail = f"--{self.boundary}--\r\n".encode()
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        length = sum(map(len, self._parts)) + sum(map(len, self._file_heads)) + len(self._tail)
+        # Every file part ends with \r\n
+        return length + sum(upload.size() + 2 for upload in self.files)
+
+    async def write_to(self, writer: asyncio.StreamWriter, chunk_size: int = CHUNK_SIZE) -> None:
+        """Writes the body, waiting for every chunk to be flushed before reading the next."""
+        for part in self._parts:
+            writer.write(part)
+        for head, upload in zip(self._file_heads, self.files):
+            writer.write(head)
+            for chunk in upload.chunks(chunk_size):
+                writer.write(chunk)
+                await writer.drain()
+            writer.write(b"\r\n")
+        writer.write(self._tail)
+        await writer.drain()
+
+    def _part_head(self, name: str, filename: str | None = None, content_type: str | None = None) -> bytes:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        lines = [f"--{self.boundary}", f"Content-Disposition: {disposition}"]
+        if content_type is not None:
+            lines.append(f"Content-Type: {content_type}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode()
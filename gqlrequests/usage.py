@@ -0,0 +1,195 @@
+"""Tracks which selected fields are actually read from responses, and prunes the rest."""
+
+from __future__ import annotations
+
+import functools
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, NamedTuple, Set, Tuple
+
+from gqlrequests.builder import FrozenQueryBuilder, QueryBuilder
+from gqlrequests.ir import Field, lower
+from gqlrequests.query_creator import FieldTypeEnum, resolve_type
+
+Path = Tuple[str, ...]
+
+
+class UsageReport(NamedTuple):
+    responses: int
+    selected: Set[str]
+    accessed: Set[str]
+    unused: Set[str]
+
+
+class UsageTracker:
+    """Records which selected fields are read from responses, per builder shape.
+
+    Responses are wrapped in read-only mappings that record every field that
+    is read. Builders with the same selection (regardless of function
+    arguments) share their usage statistics. Once a shape has been seen in
+    `min_responses` responses, `prune` removes every selected field that was
+    never read from a builder of that shape. If `auto_prune` is set, the client
+    prunes builders before sending them.
+
+    Reading a field that was pruned away still raises a KeyError, but it is
+    recorded, so the field is selected again by later prunes.
+
+    Example usage:
+
+        tracker = UsageTracker(min_responses=50, auto_prune=True)
+        client = gqlrequests.Client(transport, usage_tracker=tracker)
+
+        response = await client.execute(Character(func_name="getCharacter")(name="Luke"))
+        print(response["data"]["getCharacter"]["name"])
+
+        print(tracker.report(Character(func_name="getCharacter")(name="Leia")).unused)
+        # {'getCharacter.appearsIn', 'getCharacter.appearsIn.name', ...}
+
+    """
+
+    def __init__(self, min_responses: int = 100, auto_prune: bool = False) -> None:
+        self.min_responses = min_responses
+        self.auto_prune = auto_prune
+        self._responses: Dict[Field, int] = {}
+        self._accessed: Dict[Field, Set[Path]] = {}
+
+    def shape(self, builder: QueryBuilder | FrozenQueryBuilder) -> Field:
+        """Returns the key usage statistics are recorded under for the builder."""
+        return shape_of(lower(builder))
+
+    def track(self, shape: Field, data: Any) -> Any:
+        """Wraps response data so that reading its fields is recorded for the shape."""
+        self._responses[shape] = self._responses.get(shape, 0) + 1
+        return track(data, (), self._accessed.setdefault(shape, set()))
+
+    def report(self, builder: QueryBuilder | FrozenQueryBuilder) -> UsageReport:
+        """Returns which of the fields selected by the builder have been read."""
+        shape = self.shape(builder)
+        accessed = self._accessed.get(shape, set())
+        selected = set(selected_paths(shape, ()))
+        used = selected & accessed
+        return UsageReport(
+            self._responses.get(shape, 0),
+            {".".join(path) for path in selected},
+            {".".join(path) for path in used},
+            {".".join(path) for path in selected - used},
+        )
+
+    def prune(self, builder: QueryBuilder) -> bool:
+        """Removes every field that was never read from the builder. Does nothing
+        until `min_responses` responses have been seen for its shape. Returns
+        whether the builder was changed."""
+        shape = self.shape(builder)
+        if self._responses.get(shape, 0) < self.min_responses:
+            return False
+
+        root: Path = (shape.name,) if shape.arguments is not None else ()
+        return prune_builder(builder, root, self._accessed.get(shape, set()))
+
+
+@functools.lru_cache(maxsize=4096)
+def shape_of(field: Field) -> Field:
+    """Returns the field with all function arguments removed."""
+    arguments = None if field.arguments is None else ()
+    if field.selection is None:
+        return Field(field.name, arguments, None, field.is_list)
+    return Field(field.name, arguments, tuple(shape_of(nested) for nested in field.selection), field.is_list)
+
+
+def selected_paths(field: Field, prefix: Path) -> Iterator[Path]:
+    # Function roots are selected by their function name in responses
+    if not prefix and field.arguments is not None:
+        prefix = (field.name,)
+    for nested in field.selection or ():
+        path = prefix + (nested.name,)
+        yield path
+        yield from selected_paths(nested, path)
+
+
+def prune_builder(builder: QueryBuilder, prefix: Path, accessed: Set[Path]) -> bool:
+    fields_to_build = builder.get("fields_to_build")
+    kept: List[str] = []
+    changed = False
+    for name, value in list(fields_to_build.items()):
+        response_name = name
+        if isinstance(value, (QueryBuilder, FrozenQueryBuilder)) and value.get("build_function"):
+            response_name = value.get("func_name")
+        path = prefix + (response_name,)
+
+        if path not in accessed:
+            continue
+        kept.append(name)
+
+        field_type_type, field_type = resolve_type(value)
+        if field_type_type == FieldTypeEnum.QUERY_BUILDER_INSTANCE and isinstance(field_type, QueryBuilder):
+            changed = prune_builder(field_type, path, accessed) or changed
+        elif field_type_type == FieldTypeEnum.QUERY_BUILDER_CLASS:
+            # Builder classes always select every field, so they are replaced by a pruned instance
+            nested: QueryBuilder = field_type()  # type: ignore
+            if prune_builder(nested, path, accessed):
+                setattr(builder, name, nested)
+                changed = True
+
+    # A selection can not be empty. If none of the fields were read, keep the first one
+    if not kept and fields_to_build:
+        kept.append(next(iter(fields_to_build)))
+
+    for name in list(fields_to_build):
+        if name not in kept:
+            setattr(builder, name, None)
+            changed = True
+    return changed
+
+
+def track(data: Any, path: Path, accessed: Set[Path]) -> Any:
+    if isinstance(data, dict):
+        return TrackedDict(data, path, accessed)
+    if isinstance(data, list):
+        return TrackedList(data, path, accessed)
+    return data
+
+
+class TrackedDict(Mapping):
+    """A read-only view of a response object that records which keys are read."""
+
+    __slots__ = ("_data", "_path", "_accessed")
+
+    def __init__(self, data: Dict[str, Any], path: Path, accessed: Set[Path]) -> None:
+        self._data = data
+        self._path = path
+        self._accessed = accessed
+
+    def __getitem__(self, key: str) -> Any:
+        path = self._path + (key,)
+        self._accessed.add(path)
+        return track(self._data[key], path, self._accessed)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"TrackedDict({self._data!r})"
+
+
+class TrackedList(Sequence):
+    """A read-only view of a list in a response whose items record which keys are read."""
+
+    __slots__ = ("_data", "_path", "_accessed")
+
+    def __init__(self, data: List[Any], path: Path, accessed: Set[Path]) -> None:
+        self._data = data
+        self._path = path
+        self._accessed = accessed
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return TrackedList(self._data[index], self._path, self._accessed)
+        return track(self._data[index], self._path, self._accessed)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"TrackedList({self._data!r})"
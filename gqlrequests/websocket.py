@@ -0,0 +1,347 @@
+"""Runs GraphQL subscriptions over a WebSocket using the graphql-transport-ws protocol.
+
+Only depends on the standard library: the WebSocket handshake and framing
+(RFC 6455) needed by the protocol are implemented in this module."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import itertools
+import os
+import ssl
+import struct
+from typing import Any, AsyncIterator, Dict, Tuple
+from urllib.parse import urlsplit
+
+from gqlrequests.builder import FrozenQueryBuilder, QueryBuilder
+from gqlrequests.client import GraphQLError, build_document
+from gqlrequests.json_codec import JSONCodec, get_codec
+from gqlrequests.transport import TransportError, read_response_head
+
+PROTOCOL = "graphql-transport-ws"
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+HTTP_SWITCHING_PROTOCOLS = 101
+
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+# Payload lengths above these need a 16 or 64 bit extended length field,
+# which is announced by one of the marker lengths
+MAX_SHORT_LENGTH = 125
+MAX_16_BIT_LENGTH = 0xFFFF
+EXTENDED_16_BIT_LENGTH = 126
+EXTENDED_64_BIT_LENGTH = 127
+
+
+class ConnectionClosedError(TransportError):
+    """Raised when the WebSocket connection is closed while subscriptions are running."""
+
+
+class SubscriptionClient:
+    """Runs many subscriptions over a single multiplexed WebSocket connection.
+
+    Every subscription is an async iterator of execution results (dicts with
+    `data` and optionally `errors`). Each subscription buffers at most
+    `queue_size` results; when a consumer falls behind, the client stops
+    reading from the socket until there is room again, so the server is slowed
+    down instead of results piling up in memory. Because the connection is
+    shared, a slow consumer also holds back the other subscriptions.
+
+    Example usage:
+
+        on_review = Review(func_name="reviewAdded")
+
+        async with SubscriptionClient("wss://example.com/graphql") as client:
+            async for result in client.subscribe(on_review(episode="JEDI")):
+                print(result["data"]["reviewAdded"]["stars"])
+
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: Dict[str, str] | None = None,
+        connection_params: Dict[str, Any] | None = None,
+        queue_size: int = 16,
+        ack_timeout: float | None = 10.0,
+        json_codec: JSONCodec | None = None,
+    ) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in {"ws", "wss"}:
+            raise ValueError(f"Unsupported URL scheme for SubscriptionClient: {parts.scheme!r}")
+        if not parts.hostname:
+            raise ValueError(f"URL is missing a host: {url!r}")
+
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "wss" else 80)
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.ssl = parts.scheme == "wss"
+        self.headers = dict(headers or {})
+        self.connection_params = connection_params
+        self.queue_size = queue_size
+        self.ack_timeout = ack_timeout
+        self.json_codec = json_codec or get_codec()
+
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._reading: asyncio.Task | None = None
+        self._write_lock = asyncio.Lock()
+        self._streams: Dict[str, _SubscriptionStream] = {}
+        self._ids = itertools.count(1)
+        self._failure: BaseException | None = None
+
+    async def __aenter__(self) -> SubscriptionClient:
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def connect(self) -> None:
+        """Opens the WebSocket and waits for the server to acknowledge the connection."""
+        try:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port, ssl=ssl.create_default_context() if self.ssl else None
+            )
+        except OSError as e:
+            raise TransportError(f"Could not connect to {self.url}: {e}") from e
+
+        await self._handshake()
+        init: Dict[str, Any] = {"type": "connection_init"}
+        if self.connection_params is not None:
+            init["payload"] = self.connection_params
+        await self._send_message(init)
+
+        message = await asyncio.wait_for(self._receive_message(), self.ack_timeout)
+        if message.get("type") != "connection_ack":
+            raise TransportError(f"Expected connection_ack from the server, got {message.get('type')!r}.")
+        self._reading = asyncio.ensure_future(self._read_messages())
+
+    async def close(self) -> None:
+        """Closes the connection. Running subscriptions raise ConnectionClosedError."""
+        if self._writer is None:
+            return
+        if self._reading is not None:
+            self._reading.cancel()
+        try:
+            async with self._write_lock:
+                self._writer.write(encode_frame(OPCODE_CLOSE, struct.pack("!H", 1000), mask=True))
+                await self._writer.drain()
+        except (ConnectionError, RuntimeError):
+            pass
+        self._writer.close()
+        self._writer = None
+        self._fail_all(ConnectionClosedError("The subscription client was closed."))
+
+    async def subscribe(
+        self, query: QueryBuilder | FrozenQueryBuilder | str, variables: Dict[str, Any] | None = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Starts a subscription and yields its results until the server completes it.
+
+        Leaving the loop early (or calling `aclose()` on the iterator) tells the
+        server to stop the subscription.
+        """
+        if self._writer is None or self._failure is not None:
+            raise ConnectionClosedError("The subscription client is not connected.")
+
+        subscription_id = str(next(self._ids))
+        stream = _SubscriptionStream(self.queue_size)
+        self._streams[subscription_id] = stream
+
+        payload: Dict[str, Any] = {"query": build_document(query, operation_type="subscription")}
+        if variables is not None:
+            payload["variables"] = variables
+        await self._send_message({"id": subscription_id, "type": "subscribe", "payload": payload})
+
+        try:
+            while True:
+                if stream.queue.empty():
+                    if stream.failure is not None:
+                        raise stream.failure
+                    if stream.completed:
+                        return
+                message = await stream.queue.get()
+                if message is not _WAKE_UP:
+                    yield message
+        finally:
+            stream.close()
+            self._streams.pop(subscription_id, None)
+            if not stream.completed and self._failure is None and self._writer is not None:
+                await self._send_message({"id": subscription_id, "type": "complete"})
+
+    async def _handshake(self) -> None:
+        assert self._reader is not None and self._writer is not None
+        key = base64.b64encode(os.urandom(16))
+        lines = [
+            f"GET {self.path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Upgrade: websocket",
+            "Connection: Upgrade",
+            f"Sec-WebSocket-Key: {key.decode()}",
+            "Sec-WebSocket-Version: 13",
+            f"Sec-WebSocket-Protocol: {PROTOCOL}",
+        ]
+        lines += [f"{name}: {value}" for name, value in self.headers.items()]
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self._writer.drain()
+
+        status, headers = await read_response_head(self._reader)
+        if status != HTTP_SWITCHING_PROTOCOLS:
+            raise TransportError(f"WebSocket handshake failed with status {status}.", status)
+        if headers.get("sec-websocket-accept", "").encode() != accept_key(key):
+            raise TransportError("WebSocket handshake failed: invalid Sec-WebSocket-Accept header.")
+        if headers.get("sec-websocket-protocol") != PROTOCOL:
+            raise TransportError(f"The server does not support the {PROTOCOL} protocol.")
+
+    async def _send_message(self, message: Dict[str, Any]) -> None:
+        if self._writer is None:
+            raise ConnectionClosedError("The subscription client is not connected.")
+        async with self._write_lock:
+            self._writer.write(encode_frame(OPCODE_TEXT, self.json_codec.dumps(message), mask=True))
+            await self._writer.drain()
+
+    async def _receive_message(self) -> Dict[str, Any]:
+        """Reads the next protocol message, answering WebSocket pings on the way."""
+        assert self._reader is not None
+        fragments = []
+        while True:
+            fin, opcode, payload = await read_frame(self._reader)
+            if opcode == OPCODE_PING:
+                async with self._write_lock:
+                    if self._writer is not None:
+                        self._writer.write(encode_frame(OPCODE_PONG, payload, mask=True))
+                continue
+            if opcode == OPCODE_PONG:
+                continue
+            if opcode == OPCODE_CLOSE:
+                code = struct.unpack("!H", payload[:2])[0] if payload else None
+                raise ConnectionClosedError(f"The server closed the connection ({code}): {payload[2:].decode()}")
+
+            fragments.append(payload)
+            if fin:
+                return self.json_codec.loads(payload if len(fragments) == 1 else b"".join(fragments))
+
+    async def _read_messages(self) -> None:
+        try:
+            while True:
+                message = await self._receive_message()
+                message_type = message.get("type")
+                if message_type == "ping":
+                    await self._send_message({"type": "pong"})
+                    continue
+
+                stream = self._streams.get(message.get("id", ""))
+                if stream is None:
+                    continue
+                if message_type == "next":
+                    # Waits while the subscription is full, pausing reads from the socket
+                    await stream.put(message.get("payload") or {})
+                elif message_type == "error":
+                    stream.fail(GraphQLError(message.get("payload") or []))
+                elif message_type == "complete":
+                    stream.complete()
+        except asyncio.CancelledError:
+            raise
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            self._fail_all(ConnectionClosedError(f"The connection was lost: {e}"))
+        except Exception as e:
+            self._fail_all(e)
+
+    def _fail_all(self, failure: BaseException) -> None:
+        if self._failure is None:
+            self._failure = failure
+        for stream in self._streams.values():
+            stream.fail(failure)
+
+
+_WAKE_UP = object()
+
+
+class _SubscriptionStream:
+    def __init__(self, queue_size: int) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.failure: BaseException | None = None
+        self.completed = False
+        self.closed = False
+
+    async def put(self, payload: Dict[str, Any]) -> None:
+        if not self.closed:
+            await self.queue.put(payload)
+
+    def complete(self) -> None:
+        self.completed = True
+        self._wake_up()
+
+    def fail(self, failure: BaseException) -> None:
+        # The server stops a subscription by itself after sending an error
+        self.completed = self.completed or isinstance(failure, GraphQLError)
+        self.failure = self.failure or failure
+        self._wake_up()
+
+    def close(self) -> None:
+        # Empties the queue so a reader waiting to put a result is released
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    def _wake_up(self) -> None:
+        # If the queue is full, the consumer is not waiting for it and will
+        # notice the completion or failure once it has emptied the queue
+        try:
+            self.queue.put_nowait(_WAKE_UP)
+        except asyncio.QueueFull:
+            pass
+
+
+def accept_key(key: bytes) -> bytes:
+    """Returns the Sec-WebSocket-Accept value the server must answer a key with."""
+    return base64.b64encode(hashlib.sha1(key + WEBSOCKET_GUID).digest())
+
+
+def encode_frame(opcode: int, payload: bytes, mask: bool = False) -> bytes:
+    """Encodes a single, final WebSocket frame. Clients must mask their frames."""
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length <= MAX_SHORT_LENGTH:
+        header.append(mask_bit | length)
+    elif length <= MAX_16_BIT_LENGTH:
+        header.append(mask_bit | EXTENDED_16_BIT_LENGTH)
+        header += struct.pack("!H", length)
+    else:
+        header.append(mask_bit | EXTENDED_64_BIT_LENGTH)
+        header += struct.pack("!Q", length)
+
+    if not mask:
+        return bytes(header) + payload
+    masking_key = os.urandom(4)
+    return bytes(header) + masking_key + apply_mask(payload, masking_key)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[bool, int, bytes]:
+    """Reads a WebSocket frame and returns whether it is final, its opcode and its unmasked payload."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == EXTENDED_16_BIT_LENGTH:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == EXTENDED_64_BIT_LENGTH:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+
+    masking_key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if masking_key is not None:
+        payload = apply_mask(payload, masking_key)
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+def apply_mask(payload: bytes, masking_key: bytes) -> bytes:
+    length = len(payload)
+    repeated_key = (masking_key * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated_key, "big")).to_bytes(length, "big")
@@ -15,6 +15,8 @@ setup(
     packages=["gqlrequests"],
     package_data={"gqlrequests": ["py.typed"]},
     install_requires=["pydantic"],
+    extras_require={"orjson": ["orjson"]},
+    entry_points={"console_scripts": ["gqlrequests-precompile=gqlrequests.precompile:main"]},
     license="MIT",
     version=__version__,
     description="A Python library for making GraphQL requests easier!",
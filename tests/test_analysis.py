@@ -0,0 +1,97 @@
+import pytest
+import gqlrequests
+
+from typing import List
+from pydantic import BaseModel
+from gqlrequests.analysis import CostEstimator, QueryCost, QueryTooComplexError
+
+
+class Episode(gqlrequests.QueryBuilder):
+    name: str
+    length: float
+
+class Character(gqlrequests.QueryBuilder):
+    name: str
+    appearsIn: List[Episode]
+
+class Movie(gqlrequests.QueryBuilder):
+    title: str
+    lead: Character
+
+class EpisodeModel(BaseModel):
+    name: str
+
+class Show(gqlrequests.QueryBuilder):
+    episodes: List[EpisodeModel]
+
+
+def test_primitive_fields():
+    assert CostEstimator().estimate(Episode()) == QueryCost(depth=1, field_count=2, cost=2.0)
+
+def test_list_field_multiplies_nested_cost():
+    assert CostEstimator(list_size=20).estimate(Character()) == QueryCost(depth=2, field_count=4, cost=42.0)
+
+def test_nested_object_field_is_not_multiplied():
+    assert CostEstimator(list_size=20).estimate(Movie()) == QueryCost(depth=3, field_count=6, cost=44.0)
+
+def test_pydantic_list_field():
+    assert CostEstimator(list_size=5).estimate(Show()) == QueryCost(depth=2, field_count=2, cost=6.0)
+
+def test_per_field_costs_and_list_sizes():
+    estimator = CostEstimator(field_costs={"name": 3.0}, list_sizes={"appearsIn": 2})
+    assert estimator.estimate(Character()).cost == 3.0 + 1.0 + 2 * (3.0 + 1.0)
+
+def test_nested_list_instance_is_detected_from_declared_type():
+    character = Character()
+    character.appearsIn = Episode(fields=["name"])
+    assert CostEstimator(list_size=10).estimate(character).cost == 1.0 + 1.0 + 10 * 1.0
+
+def test_pagination_argument_overrides_list_size():
+    character = Character()
+    character.appearsIn = Episode(func_name="appearsIn")(first=3)
+    assert CostEstimator(list_size=100).estimate(character).cost == 1.0 + 1.0 + 3 * 2.0
+
+def test_estimate_is_cached_per_shape():
+    estimator = CostEstimator()
+    estimator.estimate(Character())
+    cache_size = len(estimator._cache)
+    estimator.estimate(Character())
+    assert len(estimator._cache) == cache_size
+    estimator.estimate(Character(fields=["name"]))
+    assert len(estimator._cache) == cache_size + 1
+
+def test_changing_nested_class_fields_invalidates_cache():
+    class Inner(gqlrequests.QueryBuilder):
+        a: int
+
+    class Outer(gqlrequests.QueryBuilder):
+        inner: Inner
+
+    estimator = CostEstimator()
+    assert estimator.estimate(Outer()).field_count == 2
+    Inner.add_field("b", int)
+    assert estimator.estimate(Outer()).field_count == 3
+
+def test_check_raises_when_limits_are_exceeded():
+    with pytest.raises(QueryTooComplexError) as e:
+        CostEstimator(max_depth=2).check(Movie())
+    assert e.value.query_cost.depth == 3
+
+    with pytest.raises(QueryTooComplexError):
+        CostEstimator(max_cost=10).check(Character())
+
+    assert CostEstimator(max_cost=100, max_depth=3).check(Movie()).depth == 3
+
+def test_client_rejects_expensive_queries_before_sending():
+    import asyncio
+
+    sent = []
+
+    async def transport(document, variables=None):
+        sent.append(document)
+        return {"data": {}}
+
+    client = gqlrequests.Client(transport, estimator=CostEstimator(max_cost=5))
+    with pytest.raises(QueryTooComplexError):
+        asyncio.run(client.execute(Character()))
+    assert sent == []
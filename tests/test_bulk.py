@@ -0,0 +1,84 @@
+import gc
+import weakref
+import gqlrequests
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from gqlrequests.client import build_document
+
+
+class Episode(gqlrequests.QueryBuilder):
+    name: str
+
+class User(gqlrequests.QueryBuilder):
+    id: int
+    episodes: Episode
+
+
+def expected_documents(count):
+    return [build_document(User(func_name="user")(id=i)) for i in range(count)]
+
+def test_build_many_builders():
+    builders = [User(), User(fields=["id"])]
+    assert list(gqlrequests.build_many(builders)) == [build_document(builder) for builder in builders]
+
+def test_build_many_template_pairs_does_not_change_template():
+    user = User(func_name="user")
+    assert list(gqlrequests.build_many((user, {"id": i}) for i in range(5))) == expected_documents(5)
+    assert not user.get("build_function")
+
+def test_build_many_with_frozen_templates():
+    frozen = User(func_name="user").freeze()
+    assert list(gqlrequests.build_many((frozen, {"id": i}) for i in range(5))) == expected_documents(5)
+
+def test_build_many_does_not_keep_templates_alive():
+    templates = []
+
+    def items():
+        for i in range(3):
+            user = User(func_name="user")
+            templates.append(weakref.ref(user))
+            yield (user, {"id": i})
+
+    results = gqlrequests.build_many(items())
+    next(results)
+    next(results)
+    gc.collect()
+    assert templates[0]() is None
+
+def test_build_many_with_thread_pool_is_ordered():
+    user = User(func_name="user")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        documents = list(gqlrequests.build_many(((user, {"id": i}) for i in range(1000)), executor=executor, chunk_size=7))
+    assert documents == expected_documents(1000)
+
+def test_build_many_with_process_pool():
+    user = User(func_name="user")
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        documents = list(gqlrequests.build_many(((user, {"id": i}) for i in range(300)), executor=executor, chunk_size=50))
+    assert documents == expected_documents(300)
+
+def test_build_many_unordered_yields_indices():
+    user = User(func_name="user")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = gqlrequests.build_many(
+            ((user, {"id": i}) for i in range(100)), executor=executor, ordered=False, chunk_size=3
+        )
+        documents = dict(results)
+    assert [documents[i] for i in range(100)] == expected_documents(100)
+
+def test_build_many_unordered_without_executor():
+    assert list(gqlrequests.build_many([User()], ordered=False)) == [(0, build_document(User()))]
+
+def test_build_many_consumes_items_lazily():
+    consumed = []
+
+    def items():
+        for i in range(1000):
+            consumed.append(i)
+            yield (User(func_name="user"), {"id": i})
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = gqlrequests.build_many(items(), executor=executor, chunk_size=10, max_pending_chunks=2)
+        next(results)
+        assert len(consumed) <= 30
+        results.close()
@@ -0,0 +1,237 @@
+import asyncio
+import gzip
+import json
+import zlib
+import pytest
+import gqlrequests
+from gqlrequests.client import build_document
+from gqlrequests.transport import read_response_body
+
+
+class EveryType(gqlrequests.QueryBuilder):
+    id: int
+    name: str
+
+
+class CountingTransport:
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, document, variables=None):
+        self.calls.append((document, variables))
+        await asyncio.sleep(self.delay)
+        return {"data": {"calls": len(self.calls)}}
+
+
+def test_build_document_of_plain_builder():
+    assert build_document(EveryType()) == EveryType().build()
+
+def test_build_document_wraps_function_builder():
+    correct_string = """
+{
+    getType(id: 1) {
+        id
+        name
+    }
+}
+"""[1:]
+    assert build_document(EveryType(func_name="getType")(id=1)) == correct_string
+
+def test_build_document_with_operation_type():
+    correct_string = """
+subscription {
+    getType(id: 1) {
+        id
+        name
+    }
+}
+"""[1:]
+    assert build_document(EveryType(func_name="getType")(id=1), operation_type="subscription") == correct_string
+    assert build_document(EveryType(), operation_type="mutation") == "mutation " + EveryType().build()
+
+def test_build_document_with_invalid_operation_type_raises_error():
+    with pytest.raises(ValueError):
+        build_document(EveryType(), operation_type="fragment")
+
+def test_identical_concurrent_queries_are_coalesced():
+    transport = CountingTransport()
+    client = gqlrequests.Client(transport)
+
+    async def run():
+        return await asyncio.gather(*(client.execute(EveryType(func_name="getType")(id=1)) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert len(transport.calls) == 1
+    assert all(result is results[0] for result in results)
+
+def test_different_variables_are_not_coalesced():
+    transport = CountingTransport()
+    client = gqlrequests.Client(transport)
+
+    async def run():
+        await asyncio.gather(client.execute(EveryType(), {"a": 1}), client.execute(EveryType(), {"a": 2}))
+
+    asyncio.run(run())
+    assert len(transport.calls) == 2
+
+def test_sequential_queries_are_not_coalesced():
+    transport = CountingTransport(delay=0)
+    client = gqlrequests.Client(transport)
+
+    async def run():
+        await client.execute(EveryType())
+        await client.execute(EveryType())
+
+    asyncio.run(run())
+    assert len(transport.calls) == 2
+
+def test_coalescing_can_be_disabled():
+    transport = CountingTransport()
+    client = gqlrequests.Client(transport, coalesce=False)
+
+    async def run():
+        await asyncio.gather(*(client.execute(EveryType()) for _ in range(3)))
+
+    asyncio.run(run())
+    assert len(transport.calls) == 3
+
+def test_cancelled_caller_does_not_cancel_shared_request():
+    transport = CountingTransport(delay=0.05)
+    client = gqlrequests.Client(transport)
+
+    async def run():
+        first = asyncio.ensure_future(client.execute(EveryType()))
+        second = asyncio.ensure_future(client.execute(EveryType()))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == {"data": {"calls": 1}}
+
+def test_failed_request_is_raised_to_every_caller():
+    async def failing_transport(document, variables=None):
+        await asyncio.sleep(0.01)
+        raise gqlrequests.TransportError("boom")
+
+    client = gqlrequests.Client(failing_transport)
+
+    async def run():
+        return await asyncio.gather(client.execute(EveryType()), client.execute(EveryType()), return_exceptions=True)
+
+    assert all(isinstance(result, gqlrequests.TransportError) for result in asyncio.run(run()))
+
+
+# HTTP transport
+
+async def serve_once(status, body, chunked=False, headers=""):
+    received = {}
+
+    async def handle(reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int([line for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")][0].split(b":")[1])
+        received["head"] = head
+        received["body"] = await reader.readexactly(length)
+        if chunked:
+            writer.write(f"HTTP/1.1 {status} OK\r\n{headers}Transfer-Encoding: chunked\r\n\r\n".encode())
+            for i in range(0, len(body), 4):
+                writer.write(f"{len(body[i:i + 4]):x}\r\n".encode() + body[i:i + 4] + b"\r\n")
+            writer.write(b"0\r\n\r\n")
+        else:
+            writer.write(f"HTTP/1.1 {status} OK\r\n{headers}Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}/graphql", received
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_http_transport_posts_json_and_decodes_response(chunked):
+    async def run():
+        server, url, received = await serve_once(200, b'{"data": {"id": 1}}', chunked)
+        async with server:
+            transport = gqlrequests.HTTPTransport(url, headers={"X-Test": "yes"})
+            response = await transport("{ id }", {"a": 1})
+        return response, received
+
+    response, received = asyncio.run(run())
+    assert response == {"data": {"id": 1}}
+    assert received["head"].startswith(b"POST /graphql HTTP/1.1")
+    assert b"X-Test: yes" in received["head"]
+    assert json.loads(received["body"]) == {"query": "{ id }", "variables": {"a": 1}}
+
+def test_http_transport_raises_on_error_status():
+    async def run():
+        server, url, _ = await serve_once(500, b"oops")
+        async with server:
+            await gqlrequests.HTTPTransport(url)("{ id }")
+
+    with pytest.raises(gqlrequests.TransportError) as e:
+        asyncio.run(run())
+    assert e.value.status == 500
+
+@pytest.mark.parametrize("body", [b"8\r\n{\"da", b"4\r\n{\"da\r\n", b"4\r\n{\"da\r\nzz\r\n"])
+def test_truncated_or_malformed_chunked_response_raises_transport_error(body):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(body)
+        reader.feed_eof()
+        return await read_response_body(reader, {"transfer-encoding": "chunked"})
+
+    with pytest.raises(gqlrequests.TransportError):
+        asyncio.run(run())
+
+def test_http_transport_rejects_unsupported_scheme():
+    with pytest.raises(ValueError):
+        gqlrequests.HTTPTransport("ftp://example.com")
+
+@pytest.mark.parametrize("chunked", [False, True])
+@pytest.mark.parametrize("encoding, compress", [
+    ("gzip", gzip.compress),
+    ("deflate", zlib.compress),
+    ("deflate", lambda data: zlib.compress(data)[2:-4]),  # Raw deflate without the zlib header
+])
+def test_http_transport_decompresses_response(chunked, encoding, compress):
+    body = json.dumps({"data": {"names": ["Luke"] * 1000}}).encode()
+
+    async def run():
+        server, url, received = await serve_once(200, compress(body), chunked, f"Content-Encoding: {encoding}\r\n")
+        async with server:
+            response = await gqlrequests.HTTPTransport(url)("{ names }")
+        return response, received
+
+    response, received = asyncio.run(run())
+    assert response == json.loads(body)
+    assert b"Accept-Encoding: gzip, deflate" in received["head"]
+
+def test_http_transport_rejects_unknown_response_encoding():
+    async def run():
+        server, url, _ = await serve_once(200, b"{}", headers="Content-Encoding: br\r\n")
+        async with server:
+            await gqlrequests.HTTPTransport(url)("{ id }")
+
+    with pytest.raises(gqlrequests.TransportError):
+        asyncio.run(run())
+
+def test_http_transport_can_disable_decompression():
+    async def run():
+        server, url, received = await serve_once(200, b'{"data": {}}')
+        async with server:
+            await gqlrequests.HTTPTransport(url, decompress=False)("{ id }")
+        return received
+
+    assert b"Accept-Encoding" not in asyncio.run(run())["head"]
+
+@pytest.mark.parametrize("document, compressed", [("{ id }", False), ("{ " + "id " * 1000 + "}", True)])
+def test_http_transport_compresses_requests_above_threshold(document, compressed):
+    async def run():
+        server, url, received = await serve_once(200, b'{"data": {}}')
+        async with server:
+            await gqlrequests.HTTPTransport(url, compress_threshold=1024)(document)
+        return received
+
+    received = asyncio.run(run())
+    assert (b"Content-Encoding: gzip" in received["head"]) == compressed
+    body = gzip.decompress(received["body"]) if compressed else received["body"]
+    assert json.loads(body) == {"query": document}
@@ -1,6 +1,8 @@
 import pytest
 import gqlrequests
 
+from typing import List
+
 class EveryType(gqlrequests.QueryBuilder):
     id: int
     age: int
@@ -63,4 +65,22 @@ def test_setting_property_to_none_removes_it():
 """[1:]
     every_type = EveryType(fields=["id", "company"])
     every_type.company = None
-    assert every_type.build() == correct_string
\ No newline at end of file
+    assert every_type.build() == correct_string
+
+class Episode(gqlrequests.QueryBuilder):
+    name: str
+
+class Character(gqlrequests.QueryBuilder):
+    appearsIn: List[Episode]
+
+def test_setting_builder_instance_on_list_field():
+    correct_string = """
+{
+    appearsIn(minLength: 5) {
+        name
+    }
+}
+"""[1:]
+    character = Character()
+    character.appearsIn = Episode(func_name="appearsIn")(minLength=5)
+    assert character.build() == correct_string
@@ -0,0 +1,103 @@
+import pickle
+import threading
+import pytest
+import gqlrequests
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+
+class Episode(gqlrequests.QueryBuilder):
+    name: str
+    length: float
+
+class Character(gqlrequests.QueryBuilder):
+    name: str
+    appearsIn: List[Episode]
+
+
+def test_frozen_builder_builds_like_builder():
+    character = Character(func_name="getCharacter")(name="Luke")
+    assert character.freeze().build() == character.build()
+    assert character.freeze().build(indent_size=2, start_indents=2) == character.build(indent_size=2, start_indents=2)
+
+def test_equal_builders_freeze_to_equal_snapshots():
+    assert Character().freeze() == Character().freeze()
+    assert hash(Character().freeze()) == hash(Character().freeze())
+    assert Character().freeze() != Character(fields=["name"]).freeze()
+    assert Character(func_name="f")(a=1).freeze() != Character(func_name="f")(a=True).freeze()
+
+def test_frozen_builder_cannot_be_changed():
+    frozen = Character().freeze()
+    with pytest.raises(AttributeError):
+        frozen.name = None
+
+def test_snapshot_is_not_affected_by_later_changes():
+    class Inner(gqlrequests.QueryBuilder):
+        a: int
+
+    class Outer(gqlrequests.QueryBuilder):
+        b: int
+        inner: Inner
+
+    outer = Outer()
+    expected = outer.build()
+    frozen = outer.freeze()
+
+    outer.b = None
+    Inner.add_field("c", int)
+    assert frozen.build() == expected
+    assert outer.build() != expected
+
+def test_frozen_builder_can_be_used_as_field():
+    correct_string = """
+{
+    name
+    appearsIn(first: 2) {
+        name
+    }
+}
+"""[1:]
+    character = Character()
+    character.appearsIn = Episode(fields=["name"], func_name="appearsIn")(first=2).freeze()
+    assert character.build() == correct_string
+
+def test_frozen_builder_can_be_pickled():
+    frozen = Character(func_name="getCharacter")(name="Luke").freeze()
+    assert pickle.loads(pickle.dumps(frozen)) == frozen
+
+def test_frozen_builder_builds_concurrently():
+    frozen = Character(func_name="getCharacter")(name="Luke").freeze()
+    expected = Character(func_name="getCharacter")(name="Luke").build()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda indent: frozen.build(indent_size=indent % 3 + 2), range(200)))
+
+    assert results[2] == expected
+    assert len(set(results)) == 3
+
+def test_changing_class_fields_while_instantiating_builders():
+    def get_new_sometype():
+        class SomeType(gqlrequests.QueryBuilder):
+            id: int
+
+        return SomeType
+
+    SomeType = get_new_sometype()
+    stop = threading.Event()
+
+    def mutate():
+        i = 0
+        while not stop.is_set():
+            SomeType.add_field(f"field{i % 50}", int)
+            SomeType.remove_field(f"field{(i + 25) % 50}")
+            i += 1
+
+    mutator = threading.Thread(target=mutate)
+    mutator.start()
+    try:
+        for _ in range(2000):
+            SomeType().freeze().build()
+    finally:
+        stop.set()
+        mutator.join()
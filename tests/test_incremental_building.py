@@ -0,0 +1,131 @@
+import copy
+import pickle
+import gqlrequests
+
+from typing import List
+from unittest import mock
+from gqlrequests import builder as builder_module
+
+
+class Episode(gqlrequests.QueryBuilder):
+    name: str
+    length: float
+
+class Character(gqlrequests.QueryBuilder):
+    name: str
+    age: int
+    appearsIn: List[Episode]
+
+
+def count_builds():
+    return mock.patch.object(builder_module, "build_query", wraps=builder_module.build_query)
+
+def test_building_twice_reuses_cached_result():
+    character = Character()
+    first = character.build()
+    with count_builds() as build_query:
+        assert character.build() is first
+    assert build_query.call_count == 0
+
+def test_changing_field_rebuilds_builder():
+    character = Character()
+    character.build()
+    character.age = None
+    assert character.build() == Character(fields=["name", "appearsIn"]).build()
+
+def test_changing_nested_builder_rebuilds_only_changed_branch():
+    character = Character()
+    episodes = Episode()
+    character.appearsIn = episodes
+    untouched = Character()
+    untouched.appearsIn = Episode()
+    character.build()
+
+    episodes.length = None
+    with count_builds() as build_query:
+        built = character.build()
+    assert [call.args[0] for call in build_query.call_args_list] == [character, episodes]
+    assert "length" not in built
+
+def test_unchanged_nested_builder_is_not_rebuilt():
+    character = Character()
+    episodes = Episode()
+    character.appearsIn = episodes
+    character.build()
+
+    character.age = None
+    with count_builds() as build_query:
+        character.build()
+    assert [call.args[0] for call in build_query.call_args_list] == [character]
+
+def test_calling_nested_builder_rebuilds_parent():
+    character = Character()
+    episodes = Episode(func_name="appearsIn")
+    character.appearsIn = episodes(first=1)
+    assert "appearsIn(first: 1)" in character.build()
+
+    episodes(first=2)
+    assert "appearsIn(first: 2)" in character.build()
+
+def test_replaced_nested_builder_no_longer_invalidates_parent():
+    character = Character()
+    old_episodes = Episode()
+    character.appearsIn = old_episodes
+    character.appearsIn = Episode(fields=["name"])
+    character.build()
+
+    old_episodes.length = None
+    with count_builds() as build_query:
+        character.build()
+    assert build_query.call_count == 0
+
+def test_nested_builder_shared_by_many_parents_invalidates_all():
+    episodes = Episode()
+    first, second = Character(), Character()
+    first.appearsIn = episodes
+    second.appearsIn = episodes
+    first.build()
+    second.build()
+
+    episodes.length = None
+    assert "length" not in first.build()
+    assert "length" not in second.build()
+
+def test_changing_builder_class_invalidates_cached_results():
+    def get_new_sometype():
+        class SomeType(gqlrequests.QueryBuilder):
+            id: int
+
+        class Wrapper(gqlrequests.QueryBuilder):
+            inner: SomeType
+
+        return SomeType, Wrapper
+
+    SomeType, Wrapper = get_new_sometype()
+    wrapper = Wrapper()
+    wrapper.build()
+
+    SomeType.add_field("name", str)
+    assert "name" in wrapper.build()
+
+def test_builders_with_cache_can_be_copied_and_pickled():
+    character = Character()
+    episodes = Episode()
+    character.appearsIn = episodes
+    character.build()
+
+    for clone in (pickle.loads(pickle.dumps(character)), copy.deepcopy(character)):
+        assert clone.build() == character.build()
+        clone.get("fields_to_build")["appearsIn"].length = None
+        assert "length" not in clone.build()
+        assert "length" in character.build()
+
+    clone = copy.copy(character)
+    clone.age = None
+    assert "age" not in clone.build()
+    assert "age" in character.build()
+    assert "age" in character.get("fields_to_build")
+    # Nested builders are shared by shallow copies, and changing them invalidates both
+    episodes.length = None
+    assert "length" not in character.build()
+    assert "length" not in clone.build()
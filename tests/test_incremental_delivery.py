@@ -0,0 +1,189 @@
+import asyncio
+import json
+import pytest
+import gqlrequests
+
+from typing import List
+from gqlrequests.incremental import MultipartMixedParser, merge_payload, multipart_boundary
+
+
+class Episode(gqlrequests.QueryBuilder):
+    name: str
+    length: float
+
+class Character(gqlrequests.QueryBuilder):
+    name: str
+    bio: str
+    appearsIn: List[Episode]
+    friends: List[str]
+
+
+# Rendering directives
+
+def test_deferred_fields_are_wrapped_in_inline_fragments():
+    correct_string = """
+getCharacter(name: "Luke") {
+    name
+    ... @defer(label: "slow") {
+        bio
+    }
+    ... @defer {
+        appearsIn {
+            name
+            length
+        }
+    }
+    friends
+}
+"""[1:]
+    character = Character(func_name="getCharacter")(name="Luke")
+    character.defer("bio", label="slow").defer("appearsIn")
+    assert character.build() == correct_string
+    assert character.freeze().build() == correct_string
+
+def test_streamed_list_fields_render_stream_directive():
+    correct_string = """
+{
+    name
+    ... @defer {
+        appearsIn @stream(initialCount: 2, label: "episodes") {
+            name
+        }
+    }
+    friends @stream(initialCount: 0)
+}
+"""[1:]
+    character = Character(fields=["name", "appearsIn", "friends"])
+    character.appearsIn = Episode(fields=["name"])
+    character.stream("appearsIn", 2, label="episodes").defer("appearsIn").stream("friends")
+    assert character.build() == correct_string
+    assert character.freeze().build() == correct_string
+
+def test_directives_of_nested_builders_are_rendered():
+    episode = Episode(fields=["name", "length"]).defer("length")
+    character = Character(fields=["appearsIn"])
+    character.appearsIn = episode
+    assert character.build() == "{\n    appearsIn {\n        name\n        ... @defer {\n            length\n        }\n    }\n}\n"
+    assert character.freeze().build() == character.build()
+
+def test_marking_again_replaces_directive():
+    character = Character(fields=["friends"]).stream("friends", 1).stream("friends", 5)
+    assert character.build() == "{\n    friends @stream(initialCount: 5)\n}\n"
+
+def test_only_list_fields_can_be_streamed():
+    with pytest.raises(ValueError):
+        Character().stream("name")
+
+def test_only_selected_fields_can_be_deferred():
+    with pytest.raises(ValueError):
+        Character(fields=["name"]).defer("bio")
+
+def test_removing_field_removes_its_directives():
+    character = Character(fields=["name", "bio"]).defer("bio")
+    character.bio = None
+    character.bio = str
+    assert "@defer" not in character.build()
+
+def test_frozen_templates_keep_directives():
+    template = Character(fields=["name", "bio"], func_name="getCharacter").defer("bio").freeze()
+    assert "@defer" in template(name="Leia").build()
+
+
+# Parsing and merging
+
+BODY = (
+    b"\r\n---\r\nContent-Type: application/json; charset=utf-8\r\n\r\n"
+    b'{"data":{"character":{"name":"Luke","friends":["Leia"]}},"hasNext":true}'
+    b"\r\n---\r\n\r\n{}"
+    b"\r\n---\r\nContent-Type: application/json; charset=utf-8\r\n\r\n"
+    b'{"incremental":[{"data":{"bio":"Farm boy"},"path":["character"]},'
+    b'{"items":["Han","Chewie"],"path":["character","friends",1]}],"hasNext":false}'
+    b"\r\n-----\r\n"
+)
+
+def test_parser_splits_parts_fed_in_any_chunks():
+    whole = MultipartMixedParser("-").feed(BODY)
+    assert len(whole) == 2
+
+    parser = MultipartMixedParser("-")
+    parts = [part for i in range(len(BODY)) for part in parser.feed(BODY[i:i + 1])]
+    assert parts == whole
+    assert parser.done
+
+def test_multipart_boundary_is_read_from_content_type():
+    assert multipart_boundary({"content-type": 'multipart/mixed; boundary="graphql"; deferSpec=20220824'}) == "graphql"
+    assert multipart_boundary({"content-type": "multipart/mixed"}) == "-"
+    assert multipart_boundary({"content-type": "application/json"}) is None
+
+def test_merge_payload_applies_deferred_data_and_streamed_items():
+    result = {}
+    for part in MultipartMixedParser("-").feed(BODY):
+        merge_payload(result, json.loads(part))
+    assert result == {
+        "data": {"character": {"name": "Luke", "bio": "Farm boy", "friends": ["Leia", "Han", "Chewie"]}},
+        "hasNext": False,
+    }
+
+def test_merge_payload_collects_errors_and_supports_older_format():
+    result = merge_payload({}, {"data": {"character": {"name": "Luke"}}, "hasNext": True})
+    merge_payload(result, {"data": None, "path": ["character"], "errors": [{"message": "bio failed"}], "hasNext": False})
+    assert result == {"data": {"character": {"name": "Luke"}}, "errors": [{"message": "bio failed"}], "hasNext": False}
+
+
+# Delivery over HTTP
+
+async def serve_incremental(parts, delay):
+    async def handle(reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int([line for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")][0].split(b":")[1])
+        await reader.readexactly(length)
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: multipart/mixed; boundary="-"\r\nTransfer-Encoding: chunked\r\n\r\n')
+        for part in parts:
+            writer.write(f"{len(part):x}\r\n".encode() + part + b"\r\n")
+            await writer.drain()
+            await asyncio.sleep(delay)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}/graphql"
+
+PARTS = [BODY[:90], BODY[90:200], BODY[200:]]
+
+def test_client_yields_partial_results_as_they_arrive():
+    async def run():
+        server, url = await serve_incremental(PARTS, delay=0.05)
+        async with server:
+            client = gqlrequests.Client(gqlrequests.HTTPTransport(url))
+            query = Character(fields=["name", "bio"], func_name="character")(id=1).defer("bio")
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            results = []
+            async for result in client.execute_incremental(query):
+                results.append((loop.time() - started, json.loads(json.dumps(result))))
+        return results
+
+    results = asyncio.run(run())
+    assert [result["hasNext"] for _, result in results] == [True, False]
+    assert results[0][1]["data"] == {"character": {"name": "Luke", "friends": ["Leia"]}}
+    assert results[1][1]["data"]["character"]["bio"] == "Farm boy"
+    assert results[0][0] < results[1][0] - 0.04
+
+def test_execute_merges_incremental_response():
+    async def run():
+        server, url = await serve_incremental(PARTS, delay=0)
+        async with server:
+            return await gqlrequests.Client(gqlrequests.HTTPTransport(url)).execute(Character())
+
+    assert asyncio.run(run())["data"]["character"]["friends"] == ["Leia", "Han", "Chewie"]
+
+def test_execute_incremental_without_streaming_transport():
+    async def transport(document, variables=None):
+        return {"data": {"document": document}}
+
+    async def run():
+        return [result async for result in gqlrequests.Client(transport).execute_incremental(Character(fields=["name"]))]
+
+    assert asyncio.run(run()) == [{"data": {"document": "{\n    name\n}\n"}}]
@@ -0,0 +1,110 @@
+import enum
+import gc
+import pickle
+import weakref
+import pytest
+import gqlrequests
+
+from typing import List
+from pydantic import BaseModel
+from gqlrequests.builder import freeze_class
+from gqlrequests.ir import Field, lower, lower_class, print_document
+
+
+class Color(enum.Enum):
+    RED = 1
+
+class Episode(gqlrequests.QueryBuilder):
+    name: str
+    length: float
+
+class EpisodeModel(BaseModel):
+    name: str
+
+class Character(gqlrequests.QueryBuilder):
+    _from: int
+    color: Color
+    appearsIn: List[Episode]
+    show: EpisodeModel
+
+
+def test_lowering_builder():
+    assert lower(Character(fields=["color", "appearsIn", "show"])) == Field("", None, (
+        Field("color"),
+        Field("appearsIn", None, (Field("name"), Field("length")), is_list=True),
+        Field("show", None, (Field("name"),)),
+    ))
+
+def test_lowering_function_builder():
+    character = Character(fields=["color"], func_name="getCharacter")(id=1)
+    character.appearsIn = Episode(fields=["name"], func_name="episodes")(first=True)
+    assert lower(character) == Field("getCharacter", (("id", 1),), (
+        Field("color"),
+        Field("episodes", (("first", True),), (Field("name"),), is_list=True),
+    ))
+
+def test_fields_with_equal_but_differently_typed_arguments_differ():
+    assert Field("f", (("a", 1),)) != Field("f", (("a", True),))
+
+def test_lowering_is_cached_per_shape():
+    assert lower(Character()) is lower(Character())
+    assert lower_class(Character) is lower_class(Character)
+
+def test_lowered_builder_is_cached_until_it_changes():
+    character = Character(fields=["color", "appearsIn"])
+    lowered = lower(character)
+    assert lower(character) is lowered
+
+    character.appearsIn = Episode(fields=["name"])
+    assert lower(character) == Field("", None, (
+        Field("color"),
+        Field("appearsIn", None, (Field("name"),), is_list=True),
+    ))
+
+def test_nested_builder_classes_are_snapshotted_once():
+    first = dict(Character(fields=["appearsIn"]).freeze().fields)["appearsIn"]
+    second = dict(Character(fields=["appearsIn", "color"]).freeze().fields)["appearsIn"]
+    assert first is second
+
+def test_class_snapshots_do_not_keep_classes_alive():
+    classes = [type(f"Dynamic{i}", (gqlrequests.QueryBuilder,), {"__annotations__": {"name": str}}) for i in range(5)]
+    for builder_class in classes:
+        freeze_class(builder_class)
+    references = [weakref.ref(builder_class) for builder_class in classes]
+
+    del classes, builder_class
+    gc.collect()
+    assert all(reference() is None for reference in references)
+
+def test_subclasses_do_not_share_snapshot_of_base():
+    class Droid(Character):
+        model: str
+
+    assert dict(freeze_class(Character).fields).keys() < dict(freeze_class(Droid).fields).keys()
+
+def test_lowered_class_is_updated_when_fields_change():
+    class Inner(gqlrequests.QueryBuilder):
+        a: int
+
+    assert lower_class(Inner) == Field("", None, (Field("a"),))
+    Inner.add_field("b", int)
+    assert lower_class(Inner) == Field("", None, (Field("a"), Field("b")))
+
+def test_fields_are_immutable_and_picklable():
+    field = lower(Character())
+    with pytest.raises(AttributeError):
+        field.name = "other"
+    assert pickle.loads(pickle.dumps(field)) == field
+
+@pytest.mark.parametrize("indent_size, start_indents", [(4, 0), (2, 0), (2, 6)])
+@pytest.mark.parametrize("strip_undersores", [False, True])
+def test_printing_matches_building(indent_size, start_indents, strip_undersores):
+    character = Character(func_name="getCharacter")(id=1, name="Luke")
+    character.appearsIn = Episode(func_name="episodes")(first=2)
+    options = (indent_size, start_indents, strip_undersores)
+    assert print_document(lower(character), *options) == character.build(*options)
+    assert print_document(lower(Character()), *options) == Character().build(*options)
+
+def test_printing_empty_selection_raises_error():
+    with pytest.raises(ValueError):
+        print_document(lower(Character(fields=[])))
@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+import gqlrequests
+
+from gqlrequests.json_codec import ORJSON_CODEC, STDLIB_CODEC, JSONCodec, get_codec
+
+CODECS = [STDLIB_CODEC] + ([ORJSON_CODEC] if ORJSON_CODEC is not None else [])
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_codec_encodes_to_bytes(codec):
+    assert codec.dumps({"b": 1, "a": "æ"}) == '{"b":1,"a":"æ"}'.encode()
+    assert codec.dumps({"b": 1, "a": 2}, sort_keys=True) == b'{"a":2,"b":1}'
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview, lambda data: data.decode()])
+def test_codec_decodes_bytes_like_objects(codec, wrap):
+    assert codec.loads(wrap('{"data": {"name": "æ"}}'.encode())) == {"data": {"name": "æ"}}
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_codec_raises_value_error_on_invalid_json(codec):
+    with pytest.raises(ValueError):
+        codec.loads(b"{")
+
+def test_get_codec_prefers_fastest_installed_codec():
+    assert get_codec() == (ORJSON_CODEC or STDLIB_CODEC)
+    assert get_codec("json") == STDLIB_CODEC
+
+def test_get_codec_with_unknown_name_raises_error():
+    with pytest.raises(ValueError):
+        get_codec("simdjson")
+
+def test_transport_uses_given_codec():
+    decoded = []
+
+    def loads(data):
+        decoded.append(type(data))
+        return STDLIB_CODEC.loads(data)
+
+    codec = JSONCodec("recording", STDLIB_CODEC.dumps, loads)
+
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 11\r\n\r\n{"data": 1}')
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        async with server:
+            url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+            return await gqlrequests.HTTPTransport(url, json_codec=codec)("{ id }")
+
+    assert asyncio.run(run()) == {"data": 1}
+    assert decoded == [bytes]
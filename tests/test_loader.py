@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+import gqlrequests
+
+
+class User(gqlrequests.QueryBuilder):
+    id: int
+    name: str
+
+
+class RecordingTransport:
+    def __init__(self, errors=None):
+        self.documents = []
+        self.errors = errors
+
+    async def __call__(self, document, variables=None):
+        self.documents.append(document)
+        aliases = [line.split(":")[0].strip() for line in document.splitlines() if ": user(" in line]
+        response = {"data": {alias: {"alias": alias} for alias in aliases}}
+        if self.errors:
+            response["errors"] = self.errors
+        return response
+
+
+def test_loads_in_same_tick_are_batched():
+    correct_string = """
+{
+    b0: user(id: 1) {
+        id
+        name
+    }
+    b1: user(id: 2) {
+        id
+        name
+    }
+}
+"""[1:]
+    transport = RecordingTransport()
+    loader = gqlrequests.BatchLoader(gqlrequests.Client(transport))
+
+    async def run():
+        return await asyncio.gather(
+            loader.load(User(func_name="user")(id=1)),
+            loader.load(User(func_name="user")(id=2)),
+        )
+
+    assert asyncio.run(run()) == [{"alias": "b0"}, {"alias": "b1"}]
+    assert transport.documents == [correct_string]
+
+def test_identical_loads_share_an_alias():
+    transport = RecordingTransport()
+    loader = gqlrequests.BatchLoader(gqlrequests.Client(transport))
+
+    async def run():
+        return await asyncio.gather(*(loader.load(User(func_name="user")(id=1)) for _ in range(3)))
+
+    assert asyncio.run(run()) == [{"alias": "b0"}] * 3
+    assert transport.documents[0].count("user(") == 1
+
+def test_max_batch_size_splits_batches():
+    transport = RecordingTransport()
+    loader = gqlrequests.BatchLoader(gqlrequests.Client(transport), max_batch_size=2)
+
+    async def run():
+        await asyncio.gather(*(loader.load(User(func_name="user")(id=i)) for i in range(5)))
+
+    asyncio.run(run())
+    assert [document.count("user(") for document in transport.documents] == [2, 2, 1]
+
+def test_batch_window_collects_loads_across_ticks():
+    transport = RecordingTransport()
+    loader = gqlrequests.BatchLoader(gqlrequests.Client(transport), batch_window=0.02)
+
+    async def delayed_load(i):
+        await asyncio.sleep(0.001 * i)
+        return await loader.load(User(func_name="user")(id=i))
+
+    async def run():
+        await asyncio.gather(*(delayed_load(i) for i in range(3)))
+
+    asyncio.run(run())
+    assert len(transport.documents) == 1
+
+def test_errors_are_raised_only_for_their_alias():
+    transport = RecordingTransport(errors=[{"message": "not found", "path": ["b1"]}])
+    loader = gqlrequests.BatchLoader(gqlrequests.Client(transport))
+
+    async def run():
+        return await asyncio.gather(
+            loader.load(User(func_name="user")(id=1)),
+            loader.load(User(func_name="user")(id=2)),
+            return_exceptions=True,
+        )
+
+    first, second = asyncio.run(run())
+    assert first == {"alias": "b0"}
+    assert isinstance(second, gqlrequests.GraphQLError)
+    assert "not found" in str(second)
+
+def test_transport_failure_is_raised_to_every_caller():
+    async def failing_transport(document, variables=None):
+        raise gqlrequests.TransportError("boom")
+
+    loader = gqlrequests.BatchLoader(gqlrequests.Client(failing_transport))
+
+    async def run():
+        return await asyncio.gather(
+            loader.load(User(func_name="user")(id=1)),
+            loader.load(User(func_name="user")(id=2)),
+            return_exceptions=True,
+        )
+
+    assert all(isinstance(result, gqlrequests.TransportError) for result in asyncio.run(run()))
+
+def test_loading_non_function_builder_raises_error():
+    loader = gqlrequests.BatchLoader(gqlrequests.Client(RecordingTransport()))
+    with pytest.raises(ValueError):
+        asyncio.run(loader.load(User()))
+
+def test_loading_builder_with_variables_raises_error():
+    loader = gqlrequests.BatchLoader(gqlrequests.Client(RecordingTransport()))
+    query = User(func_name="user")(id=gqlrequests.Variable("id", "Int!"))
+    with pytest.raises(ValueError):
+        asyncio.run(loader.load(query))
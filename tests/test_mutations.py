@@ -0,0 +1,125 @@
+import asyncio
+import re
+import pytest
+import gqlrequests
+
+
+class User(gqlrequests.QueryBuilder):
+    id: int
+    name: str
+
+
+create_user = User(fields=["id"], func_name="createUser").freeze()
+
+
+class MutationServer:
+    def __init__(self, delay=0.0, fail_names=(), error_names=()):
+        self.delay = delay
+        self.fail_names = set(fail_names)
+        self.error_names = set(error_names)
+        self.documents = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, document, variables=None):
+        self.documents.append(document)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+
+        selected = re.findall(r'(m\d+): createUser\(name: "(\w+)"\)', document)
+        if self.fail_names & {name for _, name in selected}:
+            raise gqlrequests.TransportError("unavailable", 503)
+        data = {alias: None if name in self.error_names else {"id": name} for alias, name in selected}
+        errors = [{"message": f"{name} exists", "path": [alias]} for alias, name in selected if name in self.error_names]
+        return {"data": data, "errors": errors} if errors else {"data": data}
+
+
+def run(mutator, mutations):
+    return asyncio.run(mutator.run(mutations))
+
+def test_mutations_are_sent_in_aliased_chunks():
+    server = MutationServer()
+    mutator = gqlrequests.BulkMutator(gqlrequests.Client(server), chunk_size=4, max_chunk_size=4)
+    results = run(mutator, (create_user(name=f"user{i}") for i in range(10)))
+
+    assert [len(re.findall("createUser", document)) for document in server.documents] == [4, 4, 2]
+    assert server.documents[0].startswith('mutation {\n    m0: createUser(name: "user0") {\n        id\n    }\n')
+    assert [result.position for result in results] == list(range(10))
+    assert [result.data for result in results] == [{"id": f"user{i}"} for i in range(10)]
+    assert all(result.ok for result in results)
+
+def test_errors_are_reported_per_mutation():
+    server = MutationServer(error_names={"user1"})
+    mutator = gqlrequests.BulkMutator(gqlrequests.Client(server), chunk_size=3)
+    results = run(mutator, [create_user(name=f"user{i}") for i in range(3)])
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert isinstance(results[1].error, gqlrequests.GraphQLError)
+    assert str(results[1].error) == "user1 exists"
+
+def test_failed_chunk_fails_its_mutations_and_shrinks_chunks():
+    server = MutationServer(fail_names={"user0"})
+    mutator = gqlrequests.BulkMutator(gqlrequests.Client(server), chunk_size=4, max_concurrency=1)
+    results = run(mutator, [create_user(name=f"user{i}") for i in range(8)])
+
+    assert [result.ok for result in results] == [False] * 4 + [True] * 2 + [True] * 2
+    assert all(isinstance(result.error, gqlrequests.TransportError) for result in results[:4])
+    assert [len(re.findall("createUser", document)) for document in server.documents] == [4, 2, 2]
+
+def test_chunks_are_limited_by_payload_size():
+    server = MutationServer()
+    size = len(create_user(name="user0").build(4, 4).encode())
+    mutator = gqlrequests.BulkMutator(gqlrequests.Client(server), chunk_size=100, max_payload_bytes=size * 3)
+    run(mutator, [create_user(name=f"user{i}") for i in range(7)])
+
+    assert [len(re.findall("createUser", document)) for document in server.documents] == [3, 3, 1]
+
+def test_fast_full_chunks_grow_chunk_size():
+    mutator = gqlrequests.BulkMutator(gqlrequests.Client(MutationServer()), chunk_size=4, max_concurrency=1)
+    run(mutator, [create_user(name=f"user{i}") for i in range(9)])
+    # 4 grows to 5 after the first chunk, and to 6 after the second (full) chunk
+    assert mutator.chunk_size == 6
+
+def test_slow_chunks_shrink_chunk_size():
+    server = MutationServer(delay=0.04)
+    mutator = gqlrequests.BulkMutator(gqlrequests.Client(server), chunk_size=10, target_latency=0.01, max_concurrency=1)
+    run(mutator, [create_user(name=f"user{i}") for i in range(10)])
+    assert mutator.chunk_size < 4
+
+def test_concurrency_is_bounded():
+    server = MutationServer(delay=0.01)
+    mutator = gqlrequests.BulkMutator(gqlrequests.Client(server), chunk_size=1, max_chunk_size=1, max_concurrency=3)
+    results = run(mutator, [create_user(name=f"user{i}") for i in range(12)])
+
+    assert len(results) == 12
+    assert server.max_running == 3
+
+def test_stream_yields_results_as_chunks_finish():
+    server = MutationServer()
+    mutator = gqlrequests.BulkMutator(gqlrequests.Client(server), chunk_size=2, max_chunk_size=2)
+
+    async def first_chunk():
+        async for result in mutator.stream(create_user(name=f"user{i}") for i in range(100)):
+            return result
+
+    # Only the first chunks were sent, not all 100 mutations
+    assert asyncio.run(first_chunk()).position < 2 * mutator.max_concurrency
+    assert len(server.documents) == mutator.max_concurrency
+
+def test_mutations_that_can_not_be_sent_fail_on_their_own():
+    server = MutationServer()
+    mutator = gqlrequests.BulkMutator(gqlrequests.Client(server), chunk_size=2)
+    variable = create_user(name=gqlrequests.Variable("name", "String!"))
+    results = run(mutator, [create_user(name=f"user{i}") for i in range(6)] + [User(), variable])
+
+    assert [result.ok for result in results] == [True] * 6 + [False, False]
+    assert all(isinstance(result.error, ValueError) for result in results[6:])
+    assert len(server.documents) == 3
+
+def test_invalid_chunk_sizes_raise_error():
+    with pytest.raises(ValueError):
+        gqlrequests.BulkMutator(gqlrequests.Client(MutationServer()), chunk_size=10, max_chunk_size=5)
@@ -0,0 +1,93 @@
+import asyncio
+import textwrap
+import pytest
+import gqlrequests
+
+from gqlrequests.precompile import Manifest, main, precompile, write_manifest
+
+QUERIES_MODULE = """
+import gqlrequests
+
+class Base(gqlrequests.QueryBuilder):
+    pass
+
+class Character(Base):
+    name: str
+    age: int
+
+get_character = Character(fields=["name"], func_name="getCharacter")(name="Luke")
+frozen_character = Character(fields=["age"]).freeze()
+_private = Character()
+Imported = gqlrequests.QueryBuilder
+create_character = Character(fields=["name"], func_name="createCharacter")(name="Leia")
+__operation_types__ = {"create_character": "mutation"}
+"""
+
+
+@pytest.fixture
+def queries_module(tmp_path, monkeypatch):
+    (tmp_path / "precompiled_queries.py").write_text(textwrap.dedent(QUERIES_MODULE))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return "precompiled_queries"
+
+def test_precompile_discovers_public_builders(queries_module):
+    documents = precompile([queries_module])
+    assert set(documents) == {
+        "precompiled_queries.Character",
+        "precompiled_queries.get_character",
+        "precompiled_queries.frozen_character",
+        "precompiled_queries.create_character",
+    }
+    assert documents["precompiled_queries.get_character"] == '{\n    getCharacter(name: "Luke") {\n        name\n    }\n}\n'
+    assert documents["precompiled_queries.create_character"].startswith('mutation {\n    createCharacter(name: "Leia")')
+    assert documents["precompiled_queries.frozen_character"] == "{\n    age\n}\n"
+
+def test_cli_writes_manifest_that_can_be_looked_up(queries_module, tmp_path, capsys):
+    output = tmp_path / "queries.gqlm"
+    assert main([queries_module, "-o", str(output)]) == 0
+    assert "Wrote 4 documents" in capsys.readouterr().out
+
+    documents = precompile([queries_module])
+    with Manifest(output) as manifest:
+        assert len(manifest) == 4
+        assert dict(manifest) == documents
+        assert "precompiled_queries._private" not in manifest
+
+def test_manifest_entries_have_sha256_digests(tmp_path):
+    import hashlib
+
+    write_manifest(tmp_path / "queries.gqlm", {"a": "{ a }", "b": "{ b }"})
+    with Manifest(tmp_path / "queries.gqlm") as manifest:
+        entry = manifest.entry("b")
+        assert entry.document == "{ b }"
+        assert entry.sha256 == hashlib.sha256(b"{ b }").hexdigest()
+        assert manifest.entry("c") is None
+        with pytest.raises(KeyError):
+            manifest["c"]
+
+def test_manifest_with_many_documents(tmp_path):
+    documents = {f"query{i}": f"{{ field{i} }}" for i in range(1000)}
+    write_manifest(tmp_path / "queries.gqlm", documents)
+    with Manifest(tmp_path / "queries.gqlm") as manifest:
+        assert all(manifest[name] == document for name, document in documents.items())
+        assert sorted(manifest) == sorted(documents)
+
+def test_empty_manifest(tmp_path):
+    write_manifest(tmp_path / "queries.gqlm", {})
+    with Manifest(tmp_path / "queries.gqlm") as manifest:
+        assert len(manifest) == 0
+        assert manifest.get("anything") is None
+
+def test_invalid_manifest_raises_error(tmp_path):
+    (tmp_path / "queries.gqlm").write_bytes(b"not a manifest, just some bytes")
+    with pytest.raises(ValueError):
+        Manifest(tmp_path / "queries.gqlm")
+
+def test_prebuilt_documents_can_be_executed(tmp_path):
+    async def transport(document, variables=None):
+        return {"data": {"document": document}}
+
+    write_manifest(tmp_path / "queries.gqlm", {"names": "{\n    name\n}\n"})
+    with Manifest(tmp_path / "queries.gqlm") as manifest:
+        response = asyncio.run(gqlrequests.Client(transport).execute(manifest["names"]))
+    assert response == {"data": {"document": "{\n    name\n}\n"}}
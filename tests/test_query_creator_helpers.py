@@ -4,6 +4,7 @@ import pytest
 import typing
 import gqlrequests
 from gqlrequests.query_creator import generate_fields, generate_query_string, generate_function_query_string
+from gqlrequests.query_creator import generate_aliased_query_string
 from gqlrequests.query_creator import FieldTypeEnum, resolve_type
 
 
@@ -174,4 +175,27 @@ def test_resolve_list_field_python_38():
         age: typing.List[typing.List[typing.List[int]]]
     
     hints = typing.get_type_hints(Test)
-    assert resolve_type(hints["age"]) == (FieldTypeEnum.PRIMITIVE, int)
\ No newline at end of file
+    assert resolve_type(hints["age"]) == (FieldTypeEnum.PRIMITIVE, int)
+
+# Generate aliased query string function
+
+def test_generate_aliased_query_string():
+    correct_string = """
+{
+    a: innerFunc(id: 1) {
+        age
+    }
+    b: innerFunc(id: 2) {
+        age
+    }
+}
+"""[1:]
+    selections = {
+        "a": AgeType(func_name="innerFunc")(id=1),
+        "b": AgeType(func_name="innerFunc")(id=2),
+    }
+    assert generate_aliased_query_string(selections) == correct_string
+
+def test_generate_aliased_query_string_with_non_function_raises_error():
+    with pytest.raises(ValueError):
+        generate_aliased_query_string({"a": AgeType()})
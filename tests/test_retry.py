@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+import gqlrequests
+
+from gqlrequests.retry import hedged
+
+
+class EveryType(gqlrequests.QueryBuilder):
+    id: int
+    name: str
+
+
+class FlakyTransport:
+    def __init__(self, failures, delays=()):
+        self.failures = list(failures)
+        self.delays = list(delays)
+        self.calls = 0
+
+    async def __call__(self, document, variables=None):
+        self.calls += 1
+        if self.delays:
+            await asyncio.sleep(self.delays.pop(0))
+        if self.failures:
+            raise self.failures.pop(0)
+        return {"data": {"calls": self.calls}}
+
+
+def test_retry_delay_is_jittered_and_capped():
+    policy = gqlrequests.RetryPolicy(base_delay=0.1, max_delay=0.5)
+    delays = [policy.delay(attempt) for attempt in range(10) for _ in range(20)]
+    assert all(0 <= delay <= 0.5 for delay in delays)
+    assert len(set(delays)) > 1
+
+def test_retry_policy_retries_only_transient_errors():
+    policy = gqlrequests.RetryPolicy()
+    assert policy.should_retry(gqlrequests.TransportError("connection refused"))
+    assert policy.should_retry(gqlrequests.TransportError("unavailable", 503))
+    assert policy.should_retry(gqlrequests.TransportError("slow down", 429))
+    assert policy.should_retry(asyncio.TimeoutError())
+    assert not policy.should_retry(gqlrequests.TransportError("bad request", 400))
+    assert not policy.should_retry(ValueError())
+
+def test_retry_policy_needs_an_attempt():
+    with pytest.raises(ValueError):
+        gqlrequests.RetryPolicy(attempts=0)
+
+def test_failed_query_is_retried():
+    transport = FlakyTransport([gqlrequests.TransportError("unavailable", 503)] * 2)
+    client = gqlrequests.Client(transport, retry=gqlrequests.RetryPolicy(attempts=3, base_delay=0.001))
+
+    assert asyncio.run(client.execute(EveryType())) == {"data": {"calls": 3}}
+
+def test_query_gives_up_after_attempts():
+    transport = FlakyTransport([gqlrequests.TransportError("unavailable", 503)] * 3)
+    client = gqlrequests.Client(transport, retry=gqlrequests.RetryPolicy(attempts=2, base_delay=0.001))
+
+    with pytest.raises(gqlrequests.TransportError):
+        asyncio.run(client.execute(EveryType()))
+    assert transport.calls == 2
+
+def test_client_errors_are_not_retried():
+    transport = FlakyTransport([gqlrequests.TransportError("bad request", 400)])
+    client = gqlrequests.Client(transport, retry=gqlrequests.RetryPolicy(base_delay=0.001))
+
+    with pytest.raises(gqlrequests.TransportError):
+        asyncio.run(client.execute(EveryType()))
+    assert transport.calls == 1
+
+def test_mutations_are_not_retried():
+    transport = FlakyTransport([gqlrequests.TransportError("unavailable", 503)])
+    client = gqlrequests.Client(transport, retry=gqlrequests.RetryPolicy(base_delay=0.001))
+
+    with pytest.raises(gqlrequests.TransportError):
+        asyncio.run(client.execute(EveryType(func_name="deleteType")(id=1), operation_type="mutation"))
+    assert transport.calls == 1
+
+def test_latencies_are_tracked_per_operation():
+    client = gqlrequests.Client(FlakyTransport([], delays=[0.02, 0.0]))
+
+    async def run():
+        await client.execute(EveryType(func_name="getType")(id=1))
+        await client.execute(EveryType(func_name="getType")(id=2))
+
+    asyncio.run(run())
+    assert client.latencies.samples("getType") == 2
+    assert client.latencies.percentile("getType", 0.99) >= 0.02
+    assert client.latencies.percentile("getType", 0.0) < 0.02
+    assert client.latencies.percentile("otherType", 0.5) is None
+
+def test_latency_tracker_keeps_a_window():
+    latencies = gqlrequests.LatencyTracker(window=3)
+    for seconds in [10.0, 1.0, 2.0, 3.0]:
+        latencies.record("op", seconds)
+    assert latencies.samples("op") == 3
+    assert latencies.percentile("op", 1.0) == 3.0
+
+def test_latency_tracker_forgets_least_recently_recorded_operations():
+    latencies = gqlrequests.LatencyTracker(max_operations=2)
+    latencies.record("a", 1.0)
+    latencies.record("b", 1.0)
+    latencies.record("a", 2.0)
+    latencies.record("c", 1.0)
+    assert [latencies.samples(operation) for operation in "abc"] == [2, 0, 1]
+
+def test_hedge_waits_for_enough_samples():
+    latencies = gqlrequests.LatencyTracker()
+    hedge = gqlrequests.HedgePolicy(percentile=0.5, min_samples=2)
+    latencies.record("op", 0.1)
+    assert hedge.threshold(latencies, "op") is None
+    latencies.record("op", 0.3)
+    assert hedge.threshold(latencies, "op") == 0.3
+    assert gqlrequests.HedgePolicy(delay=0.05).threshold(latencies, "other") == 0.05
+
+def test_slow_query_is_hedged_and_first_answer_wins():
+    transport = FlakyTransport([], delays=[1.0, 0.01])
+    client = gqlrequests.Client(transport, hedge=gqlrequests.HedgePolicy(delay=0.02))
+
+    async def run():
+        started = asyncio.get_running_loop().time()
+        response = await client.execute(EveryType())
+        return response, asyncio.get_running_loop().time() - started
+
+    response, elapsed = asyncio.run(run())
+    assert response == {"data": {"calls": 2}}
+    assert elapsed < 0.5
+
+def test_fast_query_is_not_hedged():
+    transport = FlakyTransport([], delays=[0.0])
+    client = gqlrequests.Client(transport, hedge=gqlrequests.HedgePolicy(delay=0.05))
+    asyncio.run(client.execute(EveryType()))
+    assert transport.calls == 1
+
+def test_hedged_raises_when_every_request_fails():
+    async def send():
+        await asyncio.sleep(0.01)
+        raise gqlrequests.TransportError("unavailable", 503)
+
+    with pytest.raises(gqlrequests.TransportError):
+        asyncio.run(hedged(send, 0.001, max_hedges=2))
+
+def test_hedged_uses_hedge_when_first_request_fails():
+    answers = iter([gqlrequests.TransportError("unavailable", 503), "answer"])
+
+    async def send():
+        answer = next(answers)
+        await asyncio.sleep(0.02 if isinstance(answer, Exception) else 0.03)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    assert asyncio.run(hedged(send, 0.01, max_hedges=1)) == "answer"
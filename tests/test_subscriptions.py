@@ -0,0 +1,193 @@
+import asyncio
+import json
+import pytest
+import gqlrequests
+
+from gqlrequests.websocket import (
+    OPCODE_CLOSE, OPCODE_PING, OPCODE_PONG, OPCODE_TEXT, ConnectionClosedError, SubscriptionClient, accept_key,
+    encode_frame, read_frame,
+)
+
+
+class Review(gqlrequests.QueryBuilder):
+    stars: int
+
+
+class StandInServer:
+    """A minimal graphql-transport-ws server. Every subscription gets `count`
+    results, unless its document contains "error" or "forever"."""
+
+    def __init__(self, count=3):
+        self.count = count
+        self.connections = 0
+        self.received = []
+        self.pongs = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/graphql"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        await reader.readline()
+        headers = {}
+        while (line := await reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept_key(headers["sec-websocket-key"].encode()) + b"\r\n"
+            b"Sec-WebSocket-Protocol: graphql-transport-ws\r\n\r\n"
+        )
+
+        def send(message):
+            writer.write(encode_frame(OPCODE_TEXT, json.dumps(message).encode()))
+
+        emitters = {}
+        try:
+            while True:
+                _, opcode, payload = await read_frame(reader)
+                if opcode == OPCODE_CLOSE:
+                    break
+                if opcode == OPCODE_PONG:
+                    self.pongs += 1
+                    continue
+                message = json.loads(payload)
+                self.received.append(message)
+                if message["type"] == "connection_init":
+                    send({"type": "connection_ack"})
+                    writer.write(encode_frame(OPCODE_PING, b"hi"))
+                elif message["type"] == "subscribe":
+                    emitters[message["id"]] = asyncio.ensure_future(self.emit(message, send, writer))
+                elif message["type"] == "complete":
+                    emitters.pop(message["id"]).cancel()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            for emitter in emitters.values():
+                emitter.cancel()
+            writer.close()
+
+    async def emit(self, message, send, writer):
+        query = message["payload"]["query"]
+        if "error" in query:
+            send({"id": message["id"], "type": "error", "payload": [{"message": "bad subscription"}]})
+            return
+        i = 0
+        while "forever" in query or i < self.count:
+            send({"id": message["id"], "type": "next", "payload": {"data": {"stars": i}}})
+            await writer.drain()
+            await asyncio.sleep(0)
+            i += 1
+        send({"id": message["id"], "type": "complete"})
+
+
+def run_with_server(test, **server_options):
+    async def run():
+        server = StandInServer(**server_options)
+        url = await server.start()
+        try:
+            return await test(server, url)
+        finally:
+            await server.stop()
+
+    return asyncio.run(run())
+
+
+def test_subscription_yields_results_until_complete():
+    async def test(server, url):
+        async with SubscriptionClient(url) as client:
+            return [result async for result in client.subscribe(Review(func_name="reviewAdded")(episode="JEDI"))]
+
+    results = run_with_server(test)
+    assert results == [{"data": {"stars": i}} for i in range(3)]
+
+def test_subscription_document_is_sent_as_subscription():
+    async def test(server, url):
+        async with SubscriptionClient(url, connection_params={"token": "abc"}) as client:
+            async for _ in client.subscribe(Review(func_name="reviewAdded")(episode="JEDI"), {"a": 1}):
+                pass
+        return server.received
+
+    received = run_with_server(test)
+    assert received[0] == {"type": "connection_init", "payload": {"token": "abc"}}
+    assert received[1]["type"] == "subscribe"
+    assert received[1]["payload"]["query"].startswith("subscription {\n    reviewAdded(episode: \"JEDI\")")
+    assert received[1]["payload"]["variables"] == {"a": 1}
+
+def test_many_subscriptions_share_one_connection():
+    async def test(server, url):
+        async with SubscriptionClient(url) as client:
+            async def collect():
+                return [result async for result in client.subscribe(Review(func_name="reviewAdded")())]
+
+            results = await asyncio.gather(*(collect() for _ in range(5)))
+        return server.connections, results
+
+    connections, results = run_with_server(test, count=20)
+    assert connections == 1
+    assert all(len(result) == 20 for result in results)
+
+def test_slow_consumer_receives_every_result_in_order():
+    async def test(server, url):
+        async with SubscriptionClient(url, queue_size=2) as client:
+            results = []
+            async for result in client.subscribe(Review(func_name="reviewAdded")()):
+                await asyncio.sleep(0.001)
+                results.append(result["data"]["stars"])
+            return results
+
+    assert run_with_server(test, count=50) == list(range(50))
+
+def test_leaving_subscription_early_completes_it_on_the_server():
+    async def test(server, url):
+        async with SubscriptionClient(url, queue_size=1) as client:
+            async for result in client.subscribe(Review(func_name="forever")()):
+                if result["data"]["stars"] == 5:
+                    break
+            await asyncio.sleep(0.05)
+            return server.received
+
+    received = run_with_server(test)
+    assert received[-1] == {"id": "1", "type": "complete"}
+
+def test_subscription_error_is_raised():
+    async def test(server, url):
+        async with SubscriptionClient(url) as client:
+            async for _ in client.subscribe(Review(func_name="error")()):
+                pass
+
+    with pytest.raises(gqlrequests.GraphQLError) as e:
+        run_with_server(test)
+    assert "bad subscription" in str(e.value)
+
+def test_websocket_pings_are_answered():
+    async def test(server, url):
+        async with SubscriptionClient(url) as client:
+            async for _ in client.subscribe(Review(func_name="reviewAdded")()):
+                pass
+        return server.pongs
+
+    assert run_with_server(test) == 1
+
+def test_closing_client_ends_running_subscriptions():
+    async def test(server, url):
+        client = SubscriptionClient(url)
+        await client.connect()
+        subscription = client.subscribe(Review(func_name="forever")())
+        await subscription.__anext__()
+        await client.close()
+        async for _ in subscription:
+            pass
+
+    with pytest.raises(ConnectionClosedError):
+        run_with_server(test)
+
+def test_rejects_unsupported_scheme():
+    with pytest.raises(ValueError):
+        SubscriptionClient("http://example.com")
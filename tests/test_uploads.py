@@ -0,0 +1,263 @@
+import asyncio
+import gc
+import io
+import json
+import weakref
+import gqlrequests
+import pytest
+
+from gqlrequests.client import build_document
+from gqlrequests.upload import MultipartBody, extract_files
+
+
+class Photo(gqlrequests.QueryBuilder):
+    id: int
+    url: str
+
+
+def test_upload_argument_is_rendered_as_variable():
+    upload = gqlrequests.Upload(io.BytesIO(b"image"))
+    query = Photo(fields=["id"], func_name="uploadPhoto")(photo=upload, album="Tatooine")
+    assert query.build() == 'uploadPhoto(photo: $photo, album: "Tatooine") {\n    id\n}\n'
+    assert upload.variable is None
+
+def test_reused_upload_is_named_after_each_argument():
+    upload = gqlrequests.Upload(io.BytesIO(b"image"))
+    Photo(fields=["id"], func_name="setAvatar")(avatar=upload)
+    query = Photo(fields=["id"], func_name="setBanner")(banner=upload)
+    assert query.build().startswith("setBanner(banner: $banner)")
+
+def test_different_uploads_under_one_variable_raise_error():
+    class Root(gqlrequests.QueryBuilder):
+        a: Photo
+        b: Photo
+
+    root = Root()
+    root.a = Photo(fields=["id"], func_name="up1")(photo=gqlrequests.Upload(io.BytesIO(b"1")))
+    root.b = Photo(fields=["id"], func_name="up2")(photo=gqlrequests.Upload(io.BytesIO(b"2")))
+    with pytest.raises(ValueError):
+        root.variables()
+
+    root.b = Photo(fields=["id"], func_name="up2")(photo=gqlrequests.Upload(io.BytesIO(b"2"), variable="second"))
+    assert list(root.variables()) == ["photo", "second"]
+
+def test_build_document_declares_upload_variables():
+    correct_string = """
+mutation($front: Upload!, $back: Upload!) {
+    uploadPhotos(front: $front, back: $back) {
+        id
+    }
+}
+"""[1:]
+    query = Photo(fields=["id"], func_name="uploadPhotos")(
+        front=gqlrequests.Upload(io.BytesIO(b"1")), back=gqlrequests.Upload(io.BytesIO(b"2"))
+    )
+    assert build_document(query, operation_type="mutation") == correct_string
+
+def test_uploads_of_nested_builders_are_found_after_changes():
+    class Album(gqlrequests.QueryBuilder):
+        id: int
+        cover: Photo
+
+    album = Album(fields=["id"], func_name="createAlbum")(name="Tatooine")
+    assert album.variables() == {}
+    cover = Photo(fields=["id"], func_name="cover")(image=gqlrequests.Upload(io.BytesIO(b"image")))
+    album.cover = cover
+    assert list(album.variables()) == ["image"]
+    cover(image=gqlrequests.Variable("file", "Upload!"))
+    assert album.variables() == {"file": gqlrequests.Variable("file", "Upload!")}
+
+def test_upload_variable_can_be_named():
+    upload = gqlrequests.Upload(io.BytesIO(b"image"), variable="file")
+    query = Photo(fields=["id"], func_name="uploadPhoto")(photo=upload)
+    assert query.build().startswith("uploadPhoto(photo: $file)")
+
+def test_frozen_builders_hold_variables_instead_of_uploads():
+    upload = gqlrequests.Upload(io.BytesIO(b"image"))
+    query = Photo(fields=["id"], func_name="uploadPhoto")(photo=upload)
+    frozen = query.freeze()
+    assert frozen.func_args == (("photo", gqlrequests.Variable("photo", "Upload!")),)
+    assert frozen.build() == query.build()
+
+def test_frozen_builders_reject_uploads():
+    with pytest.raises(ValueError):
+        Photo(fields=["id"], func_name="uploadPhoto").freeze()(photo=gqlrequests.Upload(io.BytesIO(b"image")))
+
+def test_uploads_are_not_kept_alive_by_build_caches():
+    async def transport(document, variables=None):
+        return {"data": {}}
+
+    client = gqlrequests.Client(transport)
+    file = io.BytesIO(b"image")
+    file_ref = weakref.ref(file)
+    query = Photo(fields=["id"], func_name="uploadPhoto")(photo=gqlrequests.Upload(file))
+    gqlrequests.ir.lower(query)
+    asyncio.run(client.execute(query, operation_type="mutation"))
+
+    del query, file
+    gc.collect()
+    assert file_ref() is None
+
+def test_variables_of_frozen_builders_are_declared_and_uploads_sent_once():
+    calls = []
+
+    async def transport(document, variables=None):
+        calls.append((document, variables))
+        return {"data": {}}
+
+    client = gqlrequests.Client(transport)
+    upload_photo = Photo(fields=["id"], func_name="uploadPhoto").freeze()
+    upload = gqlrequests.Upload(io.BytesIO(b"image"))
+    query = upload_photo(photo=gqlrequests.Variable("file", "Upload!"))
+
+    asyncio.run(client.execute(query, {"file": upload}, operation_type="mutation"))
+    assert calls == [(
+        "mutation($file: Upload!) {\n    uploadPhoto(photo: $file) {\n        id\n    }\n}\n", {"file": upload}
+    )]
+
+def test_upload_filename_defaults_to_path_name(tmp_path):
+    path = tmp_path / "luke.png"
+    path.write_bytes(b"image")
+    assert gqlrequests.Upload(path).filename == "luke.png"
+    assert gqlrequests.Upload(str(path)).filename == "luke.png"
+    with open(path, "rb") as file:
+        assert gqlrequests.Upload(file).filename == "luke.png"
+    assert gqlrequests.Upload(io.BytesIO(b"image")).filename == "upload"
+
+def test_uploads_are_passed_as_variables_and_not_coalesced():
+    calls = []
+
+    async def transport(document, variables=None):
+        calls.append((document, variables))
+        await asyncio.sleep(0.01)
+        return {"data": {}}
+
+    client = gqlrequests.Client(transport)
+    upload = gqlrequests.Upload(io.BytesIO(b"image"))
+    query = Photo(fields=["id"], func_name="uploadPhoto")(photo=upload)
+
+    async def run():
+        await asyncio.gather(*(client.execute(query, operation_type="mutation") for _ in range(2)))
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert list(calls[0][1]) == ["photo"]
+    assert calls[0][1]["photo"].file is upload.file
+    assert calls[0][0].startswith("mutation($photo: Upload!)")
+
+def test_uploads_nested_in_variables_are_sent_once():
+    calls = []
+
+    async def transport(document, variables=None):
+        calls.append(variables)
+        raise gqlrequests.TransportError("unavailable", 503)
+
+    client = gqlrequests.Client(transport, retry=gqlrequests.RetryPolicy(attempts=3, base_delay=0))
+    files = [gqlrequests.Upload(io.BytesIO(b"1")), gqlrequests.Upload(io.BytesIO(b"2"))]
+    with pytest.raises(gqlrequests.TransportError):
+        asyncio.run(client.execute("query($files: [Upload!]!) { count(files: $files) }", {"files": files}))
+    assert calls == [{"files": files}]
+
+def test_mutations_are_not_coalesced():
+    calls = []
+
+    async def transport(document, variables=None):
+        calls.append(document)
+        await asyncio.sleep(0.01)
+        return {"data": {}}
+
+    client = gqlrequests.Client(transport)
+    query = Photo(fields=["id"], func_name="deletePhoto")(id=1)
+
+    async def run():
+        await asyncio.gather(*(client.execute(query, operation_type="mutation") for _ in range(3)))
+
+    asyncio.run(run())
+    assert len(calls) == 3
+
+def test_extract_files_replaces_nested_uploads_with_null():
+    first, second = gqlrequests.Upload(io.BytesIO(b"1")), gqlrequests.Upload(io.BytesIO(b"2"))
+    variables, files = extract_files({"photo": first, "album": {"photos": [second]}, "name": "x"})
+    assert variables == {"photo": None, "album": {"photos": [None]}, "name": "x"}
+    assert files == {"variables.photo": first, "variables.album.photos.0": second}
+
+def test_file_is_read_in_chunks_from_its_current_position(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes(range(256)) * 10)
+    with open(path, "rb") as file:
+        file.seek(10)
+        upload = gqlrequests.Upload(file)
+        assert upload.size() == 2550
+        chunks = list(upload.chunks(chunk_size=1000))
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 550]
+    assert b"".join(chunks) == path.read_bytes()[10:]
+
+def test_unmappable_file_objects_are_read_in_chunks():
+    upload = gqlrequests.Upload(io.BytesIO(b"abcdefg"))
+    assert upload.size() == 7
+    assert list(upload.chunks(chunk_size=3)) == [b"abc", b"def", b"g"]
+
+def test_multipart_body_length_matches_written_bytes(tmp_path):
+    path = tmp_path / "luke.png"
+    path.write_bytes(b"x" * 5000)
+
+    class Writer:
+        def __init__(self):
+            self.data = bytearray()
+
+        def write(self, data):
+            self.data += data
+
+        async def drain(self):
+            pass
+
+    body = MultipartBody(b"{}", {"variables.photo": gqlrequests.Upload(path)}, lambda obj: json.dumps(obj).encode())
+    writer = Writer()
+    asyncio.run(body.write_to(writer, chunk_size=1024))
+    assert len(writer.data) == len(body)
+
+
+def parse_multipart(content_type, body):
+    boundary = content_type.split("boundary=")[1].encode()
+    parts = {}
+    for part in body.split(b"--" + boundary)[1:-1]:
+        head, _, content = part[2:-2].partition(b"\r\n\r\n")
+        name = head.split(b'name="')[1].split(b'"')[0].decode()
+        parts[name] = (head, content)
+    return parts
+
+def test_http_transport_streams_multipart_request(tmp_path):
+    path = tmp_path / "luke.png"
+    path.write_bytes(b"\x89PNG" + bytes(range(256)) * 100)
+    received = {}
+
+    async def handle(reader, writer):
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+        headers = dict(line.split(": ", 1) for line in head.split("\r\n")[1:] if line)
+        received["content_type"] = headers["Content-Type"]
+        received["body"] = await reader.readexactly(int(headers["Content-Length"]))
+        response = b'{"data": {"uploaded": true}}'
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: " + str(len(response)).encode() + b"\r\n\r\n" + response)
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            client = gqlrequests.Client(gqlrequests.HTTPTransport(f"http://127.0.0.1:{port}/graphql"))
+            query = Photo(fields=["id"], func_name="uploadPhoto")(photo=gqlrequests.Upload(path, content_type="image/png"))
+            return await client.execute(query, operation_type="mutation")
+
+    assert asyncio.run(run()) == {"data": {"uploaded": True}}
+    assert received["content_type"].startswith("multipart/form-data; boundary=")
+
+    parts = parse_multipart(received["content_type"], received["body"])
+    assert list(parts) == ["operations", "map", "0"]
+    operations = json.loads(parts["operations"][1])
+    assert operations["query"].startswith("mutation($photo: Upload!)")
+    assert operations["variables"] == {"photo": None}
+    assert json.loads(parts["map"][1]) == {"0": ["variables.photo"]}
+    assert b'filename="luke.png"' in parts["0"][0]
+    assert b"Content-Type: image/png" in parts["0"][0]
+    assert parts["0"][1] == path.read_bytes()
@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+import gqlrequests
+
+from typing import List
+from gqlrequests.usage import UsageTracker
+
+
+class Episode(gqlrequests.QueryBuilder):
+    name: str
+    length: float
+
+class Character(gqlrequests.QueryBuilder):
+    name: str
+    age: int
+    appearsIn: List[Episode]
+
+
+RESPONSE = {"data": {"getCharacter": {"name": "Luke", "age": 19, "appearsIn": [{"name": "IV", "length": 2.1}]}}}
+
+
+def make_client(tracker, documents=None):
+    async def transport(document, variables=None):
+        if documents is not None:
+            documents.append(document)
+        return RESPONSE
+
+    return gqlrequests.Client(transport, usage_tracker=tracker)
+
+def read_name_and_episode_names(client):
+    async def run():
+        response = await client.execute(Character(func_name="getCharacter")(name="Luke"))
+        character = response["data"]["getCharacter"]
+        return character["name"], [episode["name"] for episode in character["appearsIn"]]
+
+    return asyncio.run(run())
+
+def test_tracked_response_reads_like_response():
+    assert read_name_and_episode_names(make_client(UsageTracker())) == ("Luke", ["IV"])
+
+def test_report_lists_unused_fields():
+    tracker = UsageTracker()
+    read_name_and_episode_names(make_client(tracker))
+
+    report = tracker.report(Character(func_name="getCharacter")(name="Anyone"))
+    assert report.responses == 1
+    assert report.accessed == {"getCharacter.name", "getCharacter.appearsIn", "getCharacter.appearsIn.name"}
+    assert report.unused == {"getCharacter.age", "getCharacter.appearsIn.length"}
+
+def test_prune_waits_for_min_responses():
+    tracker = UsageTracker(min_responses=2)
+    client = make_client(tracker)
+    read_name_and_episode_names(client)
+
+    character = Character(func_name="getCharacter")(name="Leia")
+    assert not tracker.prune(character)
+    read_name_and_episode_names(client)
+    assert tracker.prune(character)
+
+def test_prune_removes_unread_fields_including_nested_ones():
+    correct_string = """
+getCharacter(name: "Luke") {
+    name
+    appearsIn {
+        name
+    }
+}
+"""[1:]
+    tracker = UsageTracker(min_responses=1)
+    read_name_and_episode_names(make_client(tracker))
+
+    character = Character(func_name="getCharacter")(name="Luke")
+    assert tracker.prune(character)
+    assert character.build() == correct_string
+    assert not tracker.prune(character)
+
+def test_prune_keeps_one_field_of_selections_that_were_never_read():
+    tracker = UsageTracker(min_responses=1)
+    client = make_client(tracker)
+
+    async def run():
+        response = await client.execute(Character(func_name="getCharacter")())
+        return len(response["data"]["getCharacter"]["appearsIn"])
+
+    assert asyncio.run(run()) == 1
+    character = Character(func_name="getCharacter")()
+    tracker.prune(character)
+    assert character.build() == 'getCharacter() {\n    appearsIn {\n        name\n    }\n}\n'
+
+def test_auto_prune_narrows_later_requests():
+    documents = []
+    tracker = UsageTracker(min_responses=1, auto_prune=True)
+    client = make_client(tracker, documents)
+
+    read_name_and_episode_names(client)
+    read_name_and_episode_names(client)
+    assert "age" in documents[0]
+    assert "age" not in documents[1]
+    assert "length" not in documents[1]
+
+def test_reading_pruned_field_is_recorded_for_original_shape():
+    tracker = UsageTracker(min_responses=1, auto_prune=True)
+    client = make_client(tracker)
+    read_name_and_episode_names(client)
+
+    async def read_age():
+        response = await client.execute(Character(func_name="getCharacter")(name="Luke"))
+        return response["data"]["getCharacter"].get("age")
+
+    asyncio.run(read_age())
+    assert "getCharacter.age" in tracker.report(Character(func_name="getCharacter")(name="Leia")).accessed
+
+def test_tracked_views_are_read_only():
+    tracker = UsageTracker()
+    data = tracker.track(tracker.shape(Character()), {"name": "Luke"})
+    with pytest.raises(TypeError):
+        data["name"] = "Leia"